@@ -1,13 +1,257 @@
 import sys
 import pandas as pd
 from PySide6.QtWidgets import (QApplication, QMainWindow, QGraphicsScene, QGraphicsView,
-                               QGraphicsPixmapItem, QVBoxLayout, QWidget, QPushButton,
+                               QGraphicsRectItem, QGraphicsEllipseItem,
+                               QGraphicsLineItem, QGraphicsPolygonItem, QGraphicsPathItem,
+                               QGraphicsSimpleTextItem, QVBoxLayout, QWidget, QPushButton,
                                QHBoxLayout, QFileDialog, QInputDialog, QSlider, QTabWidget,
                                QFormLayout, QLineEdit, QTableWidget, QTableWidgetItem,
-                               QHeaderView, QAbstractItemView, QComboBox, QLabel, QGridLayout)
-from PySide6.QtGui import QPixmap, QPainter, QPen, QBrush, QImage, QFont, QPolygonF, QColor
-from PySide6.QtCore import Qt, QEvent, QPointF
+                               QHeaderView, QAbstractItemView, QComboBox, QLabel, QGridLayout, QMessageBox,
+                               QStyleOptionGraphicsItem)
+from PySide6.QtGui import (QPainterPath, QPen, QBrush, QImageReader, QFont, QFontMetricsF,
+                           QPolygonF, QColor, QGuiApplication)
+from PySide6.QtCore import Qt, QEvent, QPointF, QLineF, QRectF, QObject, QTimer, QElapsedTimer
 import math
+from collections import defaultdict
+
+from tiles import ImagePyramid, TileCache, TiledImageItem
+
+# Stacking order of the annotation items within their layers, the order they were painted in
+CALIBRATION_Z, POINT_Z, MEASUREMENT_Z, AREA_Z, PREVIEW_Z = range(5)
+
+# Cell size of the hit-testing grids, in image pixels
+GRID_CELL = 64.0
+# Shapes covering more cells than this are kept in a short list instead
+GRID_MAX_CELLS = 4096
+
+# Frame rate assumed when the screen does not report one
+DEFAULT_REFRESH_RATE = 60.0
+
+# Labels and vertex markers smaller than this on screen, in pixels, are hidden
+MIN_LABEL_PX = 5
+MIN_MARKER_PX = 2
+
+# Outlines with more vertices than this are drawn simplified when zoomed out,
+# off the full outline by at most SIMPLIFY_PX screen pixels
+SIMPLIFY_VERTICES = 256
+SIMPLIFY_PX = 0.5
+
+
+def pointToLineDistance(p, p1, p2):
+    """Calculate the perpendicular distance from point p to the line segment p1-p2."""
+    line_mag = math.sqrt((p2.x() - p1.x()) ** 2 + (p2.y() - p1.y()) ** 2)
+    if line_mag < 0.000001:
+        return math.hypot(p.x() - p1.x(), p.y() - p1.y())
+
+    u1 = ((p.x() - p1.x()) * (p2.x() - p1.x()) + (p.y() - p1.y()) * (p2.y() - p1.y())) / (line_mag ** 2)
+    u = max(min(u1, 1.0), 0.0)
+    ix = p1.x() + u * (p2.x() - p1.x())
+    iy = p1.y() + u * (p2.y() - p1.y())
+    dist = math.sqrt((p.x() - ix) ** 2 + (p.y() - iy) ** 2)
+
+    return dist
+
+
+class SpatialGrid:
+    '''
+    Uniform grid index for hit testing. Each key is filed under every cell
+    its shape touches, so a query near a point only looks at the keys in
+    the few cells around it, however many there are. Keys whose shape spans
+    very many cells (a polygon around the whole drawing) are kept in a short
+    list that every query returns.
+    '''
+
+    def __init__(self, cell_size=GRID_CELL):
+        self.cell_size = cell_size
+        self.clear()
+
+    def clear(self):
+        self.cells = defaultdict(set)  # (column, row) -> keys
+        self.keys = {}  # key -> cells it is filed under (None for a large key)
+        self.large = set()
+
+    def cellRange(self, left, top, right, bottom):
+        s = self.cell_size
+        return (range(math.floor(left / s), math.floor(right / s) + 1),
+                range(math.floor(top / s), math.floor(bottom / s) + 1))
+
+    def rectCells(self, rect):
+        columns, rows = self.cellRange(rect.left(), rect.top(), rect.right(), rect.bottom())
+        if len(columns) * len(rows) > GRID_MAX_CELLS:
+            return None
+        return {(i, j) for i in columns for j in rows}
+
+    def segmentCells(self, p1, p2):
+        '''Cells along a segment, not its whole bounding box: samples every half cell, each covering its surroundings.'''
+        steps = int(math.hypot(p2.x() - p1.x(), p2.y() - p1.y()) / (self.cell_size / 2)) + 1
+        if steps > GRID_MAX_CELLS:
+            return None
+        h = self.cell_size / 4  # Every point of the segment is within h of a sample
+        cells = set()
+        for k in range(steps + 1):
+            x = p1.x() + (p2.x() - p1.x()) * k / steps
+            y = p1.y() + (p2.y() - p1.y()) * k / steps
+            columns, rows = self.cellRange(x - h, y - h, x + h, y + h)
+            cells.update((i, j) for i in columns for j in rows)
+        return cells
+
+    def insert(self, key, cells):
+        self.keys[key] = cells
+        if cells is None:
+            self.large.add(key)
+            return
+        for cell in cells:
+            self.cells[cell].add(key)
+
+    def insertRect(self, key, rect):
+        self.insert(key, self.rectCells(rect))
+
+    def insertSegment(self, key, p1, p2):
+        self.insert(key, self.segmentCells(p1, p2))
+
+    def insertPoint(self, key, point):
+        self.insert(key, self.rectCells(QRectF(point, point)))
+
+    def remove(self, key):
+        self.large.discard(key)
+        for cell in self.keys.pop(key, None) or ():
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    def query(self, point, radius):
+        '''Keys that may lie within radius of point; the caller checks the exact distance.'''
+        columns, rows = self.cellRange(point.x() - radius, point.y() - radius, point.x() + radius, point.y() + radius)
+        found = set(self.large)
+        for i in columns:
+            for j in rows:
+                found.update(self.cells.get((i, j), ()))
+        return found
+
+
+def simplifyPolygon(polygon, tolerance):
+    '''polygon without the vertices closer than tolerance to the last vertex kept.'''
+    last = polygon[0]
+    kept = [last]
+    for i in range(1, len(polygon)):
+        point = polygon[i]
+        if abs(point.x() - last.x()) >= tolerance or abs(point.y() - last.y()) >= tolerance:
+            kept.append(point)
+            last = point
+    return QPolygonF(kept)
+
+
+class Layer:
+    '''
+    Annotation items that are shown or hidden together. The items stay
+    top-level in the scene instead of children of one layer item: the
+    scene's index culls only top-level items, so under a common parent
+    every annotation would be visited on every repaint, on screen or not.
+    '''
+
+    def __init__(self, scene, z=1):
+        self.scene = scene
+        self.z = z  # Above the image
+        self.visible = True
+        self.items = set()
+
+    def add(self, item, z=0):
+        '''Add item to the scene in this layer, z above the layer's lowest items.'''
+        item.setZValue(self.z + z)
+        item.setVisible(self.visible)
+        self.scene.addItem(item)
+        self.items.add(item)
+        return item
+
+    def remove(self, item):
+        if item in self.items:
+            self.items.discard(item)
+            self.scene.removeItem(item)
+
+    def isVisible(self):
+        return self.visible
+
+    def setVisible(self, visible):
+        if visible == self.visible:
+            return
+        self.visible = visible
+        for item in self.items:
+            item.setVisible(visible)
+
+
+class OutlineItem(QGraphicsPolygonItem):
+    '''
+    Polygon item that, zoomed out, draws a copy of its polygon with the
+    vertices less than about half a screen pixel apart dropped. A copy is
+    made for each power-of-two zoom level the first time it is drawn there,
+    so an outline of thousands of vertices costs what its size on screen does.
+    '''
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.simplified = {}  # log2 of the tolerance -> simplified polygon
+
+    def setPolygon(self, polygon):
+        super().setPolygon(polygon)
+        self.simplified.clear()
+
+    def paint(self, painter, option, widget=None):
+        polygon = self.polygon()
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        # Tolerance in image pixels, rounded down to a power of two
+        k = math.floor(math.log2(SIMPLIFY_PX / scale)) if scale > 0 else 0
+        if len(polygon) <= SIMPLIFY_VERTICES or k < 0:
+            super().paint(painter, option, widget)
+            return
+        if k not in self.simplified:
+            self.simplified[k] = simplifyPolygon(polygon, 2 ** k)
+        painter.setPen(self.pen())
+        painter.setBrush(self.brush())
+        painter.drawPolygon(self.simplified[k], self.fillRule())
+
+
+class FrameScheduler(QObject):
+    '''
+    Runs callback at most once per display frame. request() marks the view
+    dirty: however many requests arrive within a frame, callback runs once,
+    with whatever state is latest by then.
+    '''
+
+    def __init__(self, callback, widget):
+        super().__init__(widget)
+        self.callback = callback
+        self.widget = widget
+        self.clock = QElapsedTimer()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.run)
+
+    def frameInterval(self):
+        '''Milliseconds per frame of the screen the widget is on.'''
+        screen = self.widget.screen() or QGuiApplication.primaryScreen()
+        rate = screen.refreshRate() if screen is not None else 0
+        return 1000.0 / (rate if rate > 0 else DEFAULT_REFRESH_RATE)
+
+    def request(self):
+        if self.timer.isActive():
+            return  # Already due this frame
+        # Run as soon as a frame has passed since the last run; a zero delay
+        # still waits for the queued events, so a burst of them coalesces
+        elapsed = self.clock.elapsed() if self.clock.isValid() else float('inf')
+        self.timer.start(int(max(0, self.frameInterval() - elapsed)))
+
+    def flush(self):
+        '''Run a pending request now, e.g. before a click acts on the hover state.'''
+        if self.timer.isActive():
+            self.timer.stop()
+            self.run()
+
+    def run(self):
+        self.clock.restart()
+        self.callback()
+
 
 class ImageViewer(QMainWindow):
     def __init__(self):
@@ -24,9 +268,9 @@ class ImageViewer(QMainWindow):
         self.annotations_visible = True
         self.text_labels_visible = True
         self.pen = QPen(Qt.red, 10, Qt.SolidLine)  # Initialize the pen attribute here
-        self.clean_image = None  # This will hold the clean copy of the image
-        self.delete_candidate = None  # To track which line is a candidate for deletion
-        self.delete_point_candidate = None  # To track which point is a candidate for deletion
+        self.image = None
+        self.delete_candidate = None  # Line or polygon item that is a candidate for deletion
+        self.delete_point_candidate = None  # Marker item of the digitized point that is a candidate for deletion
         self.zoom_factor = 1.0
         self.x_axis = None
         self.y_axis = None
@@ -38,8 +282,10 @@ class ImageViewer(QMainWindow):
         self.digitized_points = []
         self.picking_axes_points = False
         self.current_axes_points = []
-        self.selected_point = None
         self.selected_points = []  # Initialize selected_points
+        self.selected_markers = set()  # Marker items of the points selected in the table
+        self.lastPoint = QPointF()
+        self.hover_scheduler = FrameScheduler(self.updateHover, self)
 
         self.annotation_view = QGraphicsView()
         self.digitize_view = QGraphicsView()
@@ -47,15 +293,39 @@ class ImageViewer(QMainWindow):
         self.annotation_scene = QGraphicsScene()
         self.digitize_scene = QGraphicsScene()
 
-        self.annotation_pixmapItem = QGraphicsPixmapItem()
-        self.digitize_pixmapItem = QGraphicsPixmapItem()
+        # The image is drawn tile by tile from one pyramid, through a tile cache both tabs share
+        self.tile_cache = TileCache()
+        self.annotation_imageItem = TiledImageItem(self.tile_cache)
+        self.digitize_imageItem = TiledImageItem(self.tile_cache)
 
-        self.annotation_scene.addItem(self.annotation_pixmapItem)
-        self.digitize_scene.addItem(self.digitize_pixmapItem)
+        self.annotation_scene.addItem(self.annotation_imageItem)
+        self.digitize_scene.addItem(self.digitize_imageItem)
 
         self.annotation_view.setScene(self.annotation_scene)
         self.digitize_view.setScene(self.digitize_scene)
 
+        # Annotations are items in layers over the image. Labels and vertex
+        # markers have layers of their own, hidden when zoomed out too far to see them.
+        self.annotation_layer = Layer(self.annotation_scene)
+        self.annotation_label_layer = Layer(self.annotation_scene)  # Distance and area labels
+        self.marker_layer = Layer(self.annotation_scene)  # Measurement ends and polygon vertices
+        self.digitize_layer = Layer(self.digitize_scene)
+        self.label_layer = Layer(self.digitize_scene)  # Digitized point labels
+        self.layers = (self.annotation_layer, self.annotation_label_layer, self.marker_layer,
+                       self.digitize_layer, self.label_layer)
+        self.calibration_items = []
+        self.measurement_point_items = []  # Parallel to measurement_points
+        self.measurement_items = []  # (line, label), parallel to measurements
+        self.area_items = []  # (outline, label, vertices), parallel to areas
+        self.polygon_preview_items = []
+        self.axis_items = []
+        self.digitized_items = []  # (marker, label), parallel to digitized_points
+        self.axis_preview = self.digitize_layer.add(QGraphicsLineItem())
+        # Hit testing: measurement lines and polygons, and digitized point markers
+        self.annotation_index = SpatialGrid()
+        self.point_index = SpatialGrid()
+        self.axis_preview.setVisible(False)
+
         # Table for digitized points
         self.pointsTable = QTableWidget()
         self.pointsTable.setColumnCount(2)
@@ -375,12 +645,23 @@ class ImageViewer(QMainWindow):
         return tab
 
     def loadImage(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Open Image", "", "Image Files (*.png *.jpg *.bmp)")
+        path, _ = QFileDialog.getOpenFileName(self, "Open Image", "", "Image Files (*.png *.jpg *.bmp *.tif *.tiff)")
         if path:
-            self.image = QImage(path)
-            self.clean_image = self.image.copy()  # Store a clean copy of the image
-            self.annotation_pixmapItem.setPixmap(QPixmap.fromImage(self.image))
-            self.digitize_pixmapItem.setPixmap(QPixmap.fromImage(self.image))
+            # Qt refuses images over 256 MB by default; large scans are what the tiles are for
+            QImageReader.setAllocationLimit(0)
+            reader = QImageReader(path)
+            image = reader.read()
+            if image.isNull():
+                QMessageBox.warning(self, "Open Image", f"Could not open {path}: {reader.errorString()}")
+                return
+            # Decoded once; the views upload only the tiles they show
+            self.image = image
+            self.tile_cache.clear()
+            pyramid = ImagePyramid(self.image)
+            self.annotation_imageItem.setPyramid(pyramid)
+            self.digitize_imageItem.setPyramid(pyramid)
+            self.annotation_scene.setSceneRect(QRectF(self.image.rect()))
+            self.digitize_scene.setSceneRect(QRectF(self.image.rect()))
             self.measurements.clear()
             self.calibration_points.clear()
             self.measurement_points.clear()
@@ -388,6 +669,15 @@ class ImageViewer(QMainWindow):
             self.current_polygon.clear()
             self.digitized_points.clear()
             self.current_axes_points.clear()
+            self.clearItems(self.measurement_point_items)
+            self.clearItems(self.measurement_items)
+            self.clearItems(self.area_items)
+            self.clearItems(self.digitized_items)
+            self.annotation_index.clear()
+            self.point_index.clear()
+            self.selected_markers.clear()
+            self.delete_candidate = None
+            self.delete_point_candidate = None
             self.annotations_visible = True
             self.updateView()
 
@@ -395,6 +685,7 @@ class ImageViewer(QMainWindow):
         if isinstance(source.parent(), QGraphicsView) and event.type() == QEvent.MouseButtonPress:
             if event.button() == Qt.LeftButton:
                 self.lastPoint = source.parent().mapToScene(event.position().toPoint())
+                self.hover_scheduler.flush()
                 if self.pointInImage(self.lastPoint):
                     if self.delete_mode:
                         self.handleDeleteAnnotation(self.lastPoint)
@@ -409,13 +700,10 @@ class ImageViewer(QMainWindow):
                     else:
                         self.handleMousePress(self.lastPoint)
         elif isinstance(source.parent(), QGraphicsView) and event.type() == QEvent.MouseMove:
+            # Only the latest position matters: the hover work runs once per frame
             self.lastPoint = source.parent().mapToScene(event.position().toPoint())
-            if self.delete_mode:
-                self.highlightDeleteCandidate(self.lastPoint)
-            elif self.delete_point_mode:
-                self.highlightDeletePointCandidate(self.lastPoint)
-            elif self.picking_axes_points:
-                self.updateView()
+            if self.delete_mode or self.delete_point_mode or self.picking_axes_points:
+                self.hover_scheduler.request()
         elif event.type() == QEvent.Wheel:
             self.handleWheelEvent(event, source.parent())
         elif isinstance(source, QTableWidget) and event.type() == QEvent.KeyPress:
@@ -425,15 +713,24 @@ class ImageViewer(QMainWindow):
                 self.copyPointsToClipboard()
         return super().eventFilter(source, event)
 
+    def updateHover(self):
+        '''Hover feedback for the latest mouse position; unchanged highlights are left alone.'''
+        if self.delete_mode:
+            self.highlightDeleteCandidate(self.lastPoint)
+        elif self.delete_point_mode:
+            self.highlightDeletePointCandidate(self.lastPoint)
+        elif self.picking_axes_points:
+            self.updateAxisPreview()
+
     def pointInImage(self, point):
-        return self.clean_image and (0 <= point.x() < self.image.width()) and (0 <= point.y() < self.image.height())
+        return self.image is not None and (0 <= point.x() < self.image.width()) and (0 <= point.y() < self.image.height())
 
     def handleMousePress(self, point):
         
         if len(self.calibration_points) < 2: 
          # Calibration points
             self.calibration_points.append(point)
-            self.markPoint(point)
+            self.updateCalibrationItems()
             if len(self.calibration_points) == 2:
                 self.promptScaleInput()        
                 self.measureButton.setChecked(True)
@@ -445,7 +742,7 @@ class ImageViewer(QMainWindow):
                 point = self.getOrthographicProjection(p1, point)
 
             self.measurement_points.append(point)
-            self.markPoint(point)
+            self.addMeasurementPointItem(point)
             if len(self.measurement_points) % 2 == 0:
                 self.drawMeasurementLine()
 
@@ -462,20 +759,18 @@ class ImageViewer(QMainWindow):
         else:
             # Append point
             self.current_polygon.append(point)
-            self.markPoint(point)
+        self.updatePolygonPreview()
 
     def handleDigitizePoint(self, point):
         x, y = self.convertToCoordinates(point)
         self.digitized_points.append((point, x, y))  # Store the original point as well
-        self.markPoint(point)
+        self.addDigitizedItems()
         self.updatePointsTable()
-        self.updateView()
 
     def handleAxesPoint(self, point):
         if self.orthographic_mode and len(self.current_axes_points) > 0:
             point = self.getOrthographicProjection(self.current_axes_points[-1], point)
         self.current_axes_points.append(point)
-        self.markPoint(point)
         if len(self.current_axes_points) == 2:
             self.x_axis = self.current_axes_points[:2]
         elif len(self.current_axes_points) == 4:
@@ -484,37 +779,58 @@ class ImageViewer(QMainWindow):
             self.digitize_mode = True
             self.drawAxesButton.setChecked(self.picking_axes_points)
             self.digitizePointsButton.setChecked(self.digitize_mode)
-        self.updateView()
+        self.updateAxisItems()
 
     def handleDeletePoint(self, point):
-        if self.delete_point_candidate:
-            self.digitized_points = [dp for dp in self.digitized_points if dp[0] != self.delete_point_candidate[0]]
+        if self.delete_point_candidate is not None:
+            original_point = self.digitized_points[self.itemIndex(self.digitized_items, self.delete_point_candidate)][0]
+            for i in reversed(range(len(self.digitized_points))):
+                if self.digitized_points[i][0] == original_point:
+                    self.removeDigitizedPoint(i)
             self.delete_point_candidate = None
             self.updatePointsTable()
-            self.updateView()
 
     def handleDeletePointFromTable(self):
         selected_rows = sorted(set(item.row() for item in self.pointsTable.selectedItems()))
         for row in reversed(selected_rows):
-            del self.digitized_points[row]
+            self.removeDigitizedPoint(row)
         self.updatePointsTable()
-        self.updateView()
+
+    def removeDigitizedPoint(self, i):
+        del self.digitized_points[i]
+        marker, label = self.digitized_items.pop(i)
+        self.point_index.remove(marker)
+        self.selected_markers.discard(marker)
+        self.removeItems(marker, label)
 
     def highlightDeletePointCandidate(self, point):
         threshold = 5.0  # Adjust the threshold as needed
-        for original_point, x, y in self.digitized_points:
-            if math.hypot(point.x() - original_point.x(), point.y() - original_point.y()) <= threshold:
-                self.delete_point_candidate = (original_point, x, y)
-                self.updateView()
-                return
-
-        self.delete_point_candidate = None
-        self.updateView()
+        candidate = None
+        for marker in self.point_index.query(point, threshold):
+            distance = math.hypot(point.x() - marker.x(), point.y() - marker.y())
+            if distance <= threshold:
+                candidate, threshold = marker, distance  # Nearest so far
+
+        self.setDeletePointCandidate(candidate)
+
+    def setDeletePointCandidate(self, candidate):
+        '''Move the delete highlight to another digitized point marker (or none), restyling only those two.'''
+        previous = self.delete_point_candidate
+        if candidate is previous:
+            return
+        self.delete_point_candidate = candidate
+        for marker in (previous, candidate):
+            if marker is not None:
+                marker.setBrush(QBrush(self.digitizedPointColor(marker)))
 
     def highlightSelectedPoints(self):
         selected_rows = sorted(set(item.row() for item in self.pointsTable.selectedItems()))
         self.selected_points = [self.digitized_points[row] for row in selected_rows]
-        self.updateView()
+        selected_markers = set(self.digitized_items[row][0] for row in selected_rows)
+        changed = selected_markers ^ self.selected_markers
+        self.selected_markers = selected_markers
+        for marker in changed:
+            marker.setBrush(QBrush(self.digitizedPointColor(marker)))
 
     def calculateAndStoreArea(self, polygon_points):
         if len(polygon_points) < 3:
@@ -522,7 +838,7 @@ class ImageViewer(QMainWindow):
         polygon = QPolygonF(polygon_points)
         area = self.calculatePolygonArea(polygon)
         self.areas.append((polygon, area))
-        self.updateView()
+        self.addAreaItems()
 
     def calculatePolygonArea(self, polygon):
         area = 0.0
@@ -552,15 +868,12 @@ class ImageViewer(QMainWindow):
             real_distance = pixel_distance * self.scale_factor
             real_distance = self.convertLengthUnits(real_distance, from_unit="meters", to_unit=self.current_length_unit)
             self.measurements[i] = (p1, p2, real_distance)
+            self.styleMeasurement(i)
 
         for i, (polygon, _) in enumerate(self.areas):
             real_area = self.calculatePolygonArea(polygon)
             self.areas[i] = (polygon, real_area)
-
-        self.updateView()
-
-    def markPoint(self, point):
-        self.updateView()
+            self.styleArea(i)
 
     def drawMeasurementLine(self):
         p1 = self.measurement_points[-2]
@@ -569,13 +882,15 @@ class ImageViewer(QMainWindow):
         real_distance = pixel_distance * self.scale_factor
         real_distance = self.convertLengthUnits(real_distance, from_unit="meters", to_unit=self.current_length_unit)
         self.measurements.append((p1, p2, real_distance))
-        self.updateView()
+        self.addMeasurementItems()
 
     def calibrateScale(self):
         self.delete_mode = False
         self.measure_area_mode = False
         self.calibration_points.clear()
-        self.updateView()
+        self.setDeleteCandidate(None)
+        self.updateCalibrationItems()
+        self.updatePolygonPreview()
 
     def measureDistance(self):
         self.delete_mode = False
@@ -583,10 +898,12 @@ class ImageViewer(QMainWindow):
         if len(self.calibration_points) < 2:
             # Ensure we only keep calibration points if calibration is not completed
             self.measurement_points.clear()
+            self.clearItems(self.measurement_point_items)
         self.measureButton.setChecked(True)
         self.areaButton.setChecked(False)
         self.deleteButton.setChecked(False)
-        self.updateView()
+        self.setDeleteCandidate(None)
+        self.updatePolygonPreview()
 
     def measureArea(self):
         self.delete_mode = False
@@ -595,7 +912,8 @@ class ImageViewer(QMainWindow):
         self.areaButton.setChecked(self.measure_area_mode)
         self.measureButton.setChecked(False)
         self.deleteButton.setChecked(False)
-        self.updateView()
+        self.setDeleteCandidate(None)
+        self.updatePolygonPreview()
 
     def clearAnnotations(self):
         self.measurement_points.clear()
@@ -603,233 +921,329 @@ class ImageViewer(QMainWindow):
         self.areas.clear()
         self.digitized_points.clear()
         self.current_axes_points.clear()
+        self.clearItems(self.measurement_point_items)
+        self.clearItems(self.measurement_items)
+        self.clearItems(self.area_items)
+        self.clearItems(self.digitized_items)
+        self.annotation_index.clear()
+        self.point_index.clear()
+        self.selected_markers.clear()
+        self.delete_candidate = None
+        self.delete_point_candidate = None
         self.updatePointsTable()
-        self.updateView()
+        self.updateAxisPreview()
 
     def toggleAnnotations(self):
         self.annotations_visible = not self.annotations_visible
-        self.updateView()
+        self.updateLevelOfDetail()
 
     def deleteAnnotation(self):
         self.delete_mode = not self.delete_mode
         self.measure_area_mode = False
         self.digitize_mode = False
         self.picking_axes_points = False
-        self.delete_candidate = None  # Reset the delete candidate 
+        self.setDeleteCandidate(None)  # Reset the delete candidate 
         self.deleteButton.setChecked(self.delete_mode)
         self.measureButton.setChecked(False)
         self.areaButton.setChecked(False)
-        self.updateView()
+        self.updatePolygonPreview()
+        self.updateAxisPreview()
 
     def deleteDigitizedPoints(self):
         self.delete_point_mode = not self.delete_point_mode
-        self.delete_point_candidate = None  # Reset the delete point candidate
+        self.setDeletePointCandidate(None)  # Reset the delete point candidate
         self.deletePointsButton.setChecked(self.delete_point_mode)
         self.digitizePointsButton.setChecked(False)
-        self.updateView()
 
     def clearAllPoints(self):
         self.digitized_points.clear()
+        self.clearItems(self.digitized_items)
+        self.point_index.clear()
+        self.selected_markers.clear()
+        self.delete_point_candidate = None
         self.delete_point_mode = False
         self.digitize_mode = True
         self.digitizePointsButton.setChecked(self.digitize_mode)
         self.deletePointsButton.setChecked(self.delete_point_mode)
         self.updatePointsTable()
-        self.updateView()
 
     def toggleTextLabels(self, checked):
         self.text_labels_visible = not checked
-        self.updateView()
+        self.updateLevelOfDetail()
 
     def handleDeleteAnnotation(self, point):
-        if self.delete_candidate:
-            if isinstance(self.delete_candidate, tuple) and len(self.delete_candidate) == 3:
-                self.measurements.remove(self.delete_candidate)
-                p1, p2, _ = self.delete_candidate
-                if p1 in self.measurement_points:
-                    self.measurement_points.remove(p1)
-                if p2 in self.measurement_points:
-                    self.measurement_points.remove(p2)
-            elif isinstance(self.delete_candidate, QPolygonF):
-                self.areas = [area for area in self.areas if area[0] != self.delete_candidate]
-            self.delete_candidate = None
-            self.updateView()
+        item = self.delete_candidate
+        if item is None:
+            return
+        self.annotation_index.remove(item)
+        if isinstance(item, QGraphicsLineItem):
+            i = self.itemIndex(self.measurement_items, item)
+            p1, p2, _ = self.measurements.pop(i)
+            self.removeItems(*self.measurement_items.pop(i))
+            for p in (p1, p2):
+                if p in self.measurement_points:
+                    j = self.measurement_points.index(p)
+                    del self.measurement_points[j]
+                    self.removeItems(self.measurement_point_items.pop(j))
+        else:
+            i = self.itemIndex(self.area_items, item)
+            del self.areas[i]
+            self.removeItems(*self.area_items.pop(i))
+        self.delete_candidate = None
 
     def highlightDeleteCandidate(self, point):
-        def pointToLineDistance(p, p1, p2):
-            """Calculate the perpendicular distance from point p to the line segment p1-p2."""
-            line_mag = math.sqrt((p2.x() - p1.x()) ** 2 + (p2.y() - p1.y()) ** 2)
-            if line_mag < 0.000001:
-                return math.hypot(p.x() - p1.x(), p.y() - p1.y())
-
-            u1 = ((p.x() - p1.x()) * (p2.x() - p1.x()) + (p.y() - p1.y()) * (p2.y() - p1.y())) / (line_mag ** 2)
-            u = max(min(u1, 1.0), 0.0)
-            ix = p1.x() + u * (p2.x() - p1.x())
-            iy = p1.y() + u * (p2.y() - p1.y())
-            dist = math.sqrt((p.x() - ix) ** 2 + (p.y() - iy) ** 2)
-
-            return dist
-
         threshold = 5.0  # Adjust the threshold as needed
-        for p1, p2, distance in self.measurements:
-            if pointToLineDistance(point, p1, p2) <= threshold:
-                self.delete_candidate = (p1, p2, distance)
-                self.updateView()
-                return
-
-        for polygon, area in self.areas:
-            if polygon.containsPoint(point, Qt.OddEvenFill):
-                self.delete_candidate = polygon
-                self.updateView()
-                return
-
-        self.delete_candidate = None
-        self.updateView()
-
-    def updateView(self):
-        if not self.clean_image:
+        nearby = self.annotation_index.query(point, threshold)
+
+        # The nearest line within the threshold, else the smallest polygon around the point
+        candidate = None
+        for item in nearby:
+            if isinstance(item, QGraphicsLineItem):
+                line = item.line()
+                distance = pointToLineDistance(point, line.p1(), line.p2())
+                if distance <= threshold:
+                    candidate, threshold = item, distance
+
+        if candidate is None:
+            smallest = None
+            for item in nearby:
+                if isinstance(item, QGraphicsPolygonItem) and item.polygon().containsPoint(point, Qt.OddEvenFill):
+                    rect = item.polygon().boundingRect()
+                    if smallest is None or rect.width() * rect.height() < smallest:
+                        candidate, smallest = item, rect.width() * rect.height()
+
+        self.setDeleteCandidate(candidate)
+
+    def setDeleteCandidate(self, candidate):
+        '''Move the delete highlight to a measurement line or polygon item (or none), restyling only those two.'''
+        previous = self.delete_candidate
+        if candidate is previous:
             return
-        
-        temp_image = self.clean_image.copy()  # Start with a clean copy of the original image
+        self.delete_candidate = candidate
+        for item in (previous, candidate):
+            if isinstance(item, QGraphicsLineItem):
+                item.setPen(self.measurementPen(item))
+            elif isinstance(item, QGraphicsPolygonItem):
+                item.setPen(self.areaPen(item))
+
+    def itemIndex(self, items, item):
+        '''Position of the entry whose first item is item, in a list of item tuples.'''
+        return next(i for i, entry in enumerate(items) if entry[0] is item)
+
+    # Annotation items. Every annotation is a persistent item in a layer over the
+    # image, so an edit adds, removes or restyles only the items it affects.
+
+    def removeItems(self, *items):
+        for item in items:
+            for layer in self.layers:
+                layer.remove(item)
+
+    def clearItems(self, items):
+        '''Remove every item (or tuple of items) in the list from its scene, and empty the list.'''
+        for entry in items:
+            self.removeItems(*(entry if isinstance(entry, tuple) else (entry,)))
+        items.clear()
+
+    def makeMarker(self, point):
+        '''Square marker centred on point, like a point drawn with a pen of width point_size.'''
+        marker = QGraphicsRectItem()
+        marker.setPos(point)
+        marker.setPen(QPen(Qt.NoPen))
+        self.sizeMarker(marker)
+        return marker
+
+    def sizeMarker(self, marker):
+        marker.setRect(-self.point_size / 2, -self.point_size / 2, self.point_size, self.point_size)
+
+    def setLabel(self, label, point, text, color):
+        '''Label text with its baseline starting at point, where QPainter.drawText() put it.'''
+        font = QFont("Arial", self.text_size)
+        label.setFont(font)
+        label.setText(text)
+        label.setBrush(QBrush(color))
+        label.setPos(point.x(), point.y() - QFontMetricsF(font).ascent())
+
+    def vertexPath(self, points):
+        '''Circles at every vertex, as one path.'''
+        path = QPainterPath()
+        for point in points:
+            path.addEllipse(point, self.point_size / 2, self.point_size / 2)
+        return path
+
+    def updateCalibrationItems(self):
+        self.clearItems(self.calibration_items)
+        for point in self.calibration_points:
+            r = self.point_size / 2
+            item = self.annotation_layer.add(QGraphicsEllipseItem(point.x() - r, point.y() - r, 2 * r, 2 * r), CALIBRATION_Z)
+            item.setPen(QPen(Qt.black, self.point_size / 4))  # Black outline
+            item.setBrush(QBrush(Qt.green, Qt.SolidPattern))  # Green fill
+            self.calibration_items.append(item)
+
+        if len(self.calibration_points) > 1:
+            line = QGraphicsLineItem(QLineF(self.calibration_points[-2], self.calibration_points[-1]))
+            self.annotation_layer.add(line, CALIBRATION_Z)
+            line.setPen(QPen(Qt.green, self.line_width, Qt.DotLine))
+            self.calibration_items.append(line)
+
+    def addMeasurementPointItem(self, point):
+        marker = self.marker_layer.add(self.makeMarker(point), POINT_Z)
+        marker.setBrush(QBrush(Qt.red))
+        self.measurement_point_items.append(marker)
+
+    def addMeasurementItems(self):
+        '''Line and distance label of the newest measurement.'''
+        line = self.annotation_layer.add(QGraphicsLineItem(), MEASUREMENT_Z)
+        label = self.annotation_label_layer.add(QGraphicsSimpleTextItem(), MEASUREMENT_Z)
+        self.measurement_items.append((line, label))
+        self.styleMeasurement(len(self.measurements) - 1)
+        p1, p2, _ = self.measurements[-1]
+        self.annotation_index.insertSegment(line, p1, p2)
+
+    def measurementPen(self, line):
+        if self.delete_mode and line is self.delete_candidate:
+            return QPen(Qt.yellow, self.line_width, Qt.SolidLine)  # Highlight in yellow
+        return QPen(Qt.blue, self.line_width, Qt.SolidLine)
+
+    def styleMeasurement(self, i):
+        p1, p2, distance = self.measurements[i]
+        line, label = self.measurement_items[i]
+        line.setLine(QLineF(p1, p2))
+        line.setPen(self.measurementPen(line))
+        self.setLabel(label, (p1 + p2) / 2, f"{distance:.2f} {self.current_length_unit}", Qt.red)
+
+    def addAreaItems(self):
+        '''Outline, area label and vertex circles of the newest polygon.'''
+        outline = self.annotation_layer.add(OutlineItem(), AREA_Z)
+        label = self.annotation_label_layer.add(QGraphicsSimpleTextItem(), AREA_Z)
+        vertices = self.marker_layer.add(QGraphicsPathItem(), AREA_Z)
+        self.area_items.append((outline, label, vertices))
+        self.styleArea(len(self.areas) - 1)
+        self.annotation_index.insertRect(outline, self.areas[-1][0].boundingRect())
+
+    def areaPen(self, outline):
+        if self.delete_mode and outline is self.delete_candidate:
+            return QPen(Qt.yellow, self.line_width, Qt.SolidLine)  # Highlight in yellow
+        return QPen(Qt.magenta, self.line_width, Qt.SolidLine)
+
+    def styleArea(self, i):
+        polygon, area = self.areas[i]
+        outline, label, vertices = self.area_items[i]
+        outline.setPolygon(polygon)
+        outline.setPen(self.areaPen(outline))
+        self.setLabel(label, polygon.boundingRect().center(), f"{area:.2f} {self.current_area_unit}", Qt.red)
+        vertices.setPath(self.vertexPath(polygon))
+        vertices.setPen(QPen(Qt.red))
+        vertices.setBrush(QBrush(Qt.red))
+
+    def updatePolygonPreview(self):
+        '''The polygon being drawn: its edges, the edge to the last click and its vertices.'''
+        self.clearItems(self.polygon_preview_items)
+        if not (self.measure_area_mode and len(self.current_polygon) > 0):
+            return
+        path = QPainterPath(self.current_polygon[0])
+        for point in self.current_polygon[1:]:
+            path.lineTo(point)
+        if not self.orthographic_mode:
+            path.lineTo(self.lastPoint)
+        pen = QPen(Qt.cyan, self.line_width, Qt.SolidLine)
+        edges = self.annotation_layer.add(QGraphicsPathItem(path), PREVIEW_Z)
+        edges.setPen(pen)
+        vertices = self.annotation_layer.add(QGraphicsPathItem(self.vertexPath(self.current_polygon)), PREVIEW_Z)
+        vertices.setPen(pen)
+        vertices.setBrush(QBrush(Qt.red))
+        self.polygon_preview_items.extend((edges, vertices))
+
+    def updateAxisItems(self):
+        '''The x and y axes, each an arrow with its range label.'''
+        self.clearItems(self.axis_items)
+        axes = [(self.x_axis, f"X: {self.xmin} to {self.xmax}"), (self.y_axis, f"Y: {self.ymin} to {self.ymax}")]
+        for axis, text in axes:
+            if axis:
+                arrow = self.digitize_layer.add(QGraphicsPathItem(self.arrowPath(axis[0], axis[1])))
+                arrow.setPen(QPen(self.axis_color, self.line_width, Qt.SolidLine))
+                self.setLabel(QGraphicsSimpleTextItem(arrow), axis[1], text, self.axis_text_color)
+                self.axis_items.append(arrow)
+        self.updateAxisPreview()
+
+    def updateAxisPreview(self):
+        '''Dashed line from the first point of the axis being picked to the mouse.'''
+        count = len(self.current_axes_points)
+        visible = self.picking_axes_points and count in (1, 3)
+        self.axis_preview.setVisible(visible)
+        if visible:
+            self.axis_preview.setPen(QPen(self.axis_color, self.line_width, Qt.DashLine))
+            self.axis_preview.setLine(QLineF(self.current_axes_points[count - 1], self.lastPoint))
+
+    def addDigitizedItems(self):
+        '''Marker and coordinate label of the newest digitized point.'''
+        marker = self.digitize_layer.add(self.makeMarker(self.digitized_points[-1][0]))
+        label = self.label_layer.add(QGraphicsSimpleTextItem(), 1)  # Over the markers
+        self.digitized_items.append((marker, label))
+        self.styleDigitizedPoint(len(self.digitized_points) - 1)
+        self.point_index.insertPoint(marker, marker.pos())
+
+    def digitizedPointColor(self, marker):
+        if self.delete_point_mode and marker is self.delete_point_candidate:
+            return Qt.yellow  # Highlight in yellow
+        elif marker in self.selected_markers:
+            return Qt.green  # Highlight selected points in green
+        return self.point_color
+
+    def styleDigitizedPoint(self, i):
+        original_point, x, y = self.digitized_points[i]
+        marker, label = self.digitized_items[i]
+        self.sizeMarker(marker)
+        marker.setBrush(QBrush(self.digitizedPointColor(marker)))
+        self.setLabel(label, original_point, f"({x:.2f}, {y:.2f})", self.label_color)
 
-        if self.tabs.currentIndex() == 0:
-            # ANNOTAITON TAB
-
-            painter = QPainter(temp_image)
-            if self.annotations_visible:
-                # Redraw calibration points
-                for point in self.calibration_points:
-                    painter.setPen(QPen(Qt.black, self.point_size / 4))  # Set black pen for the outline
-                    painter.setBrush(QBrush(Qt.green, Qt.SolidPattern))  # Set green brush for fill
-                    painter.drawEllipse(point, self.point_size / 2, self.point_size / 2)  # Draw circles for calibration points
-
-                if len(self.calibration_points) > 1:
-                    painter.setPen(QPen(Qt.green, self.line_width, Qt.DotLine))
-                    painter.drawLine(self.calibration_points[-2], self.calibration_points[-1])
-
-                # Redraw measurement points
-                painter.setPen(QPen(Qt.red, self.point_size, Qt.SolidLine))
-                for point in self.measurement_points:
-                    painter.drawPoint(point)
-
-                # Redraw measurement lines
-                for p1, p2, distance in self.measurements:
-                    if self.delete_mode and (p1, p2, distance) == self.delete_candidate:
-                        painter.setPen(QPen(Qt.yellow, self.line_width, Qt.SolidLine))  # Highlight in yellow
-                    else:
-                        painter.setPen(QPen(Qt.blue, self.line_width, Qt.SolidLine))
-                    painter.drawLine(p1, p2)
-                    mid_point = (p1 + p2) / 2
-                    painter.setFont(QFont("Arial", self.text_size))
-                    painter.setPen(QPen(Qt.red))
-                    painter.drawText(mid_point, f"{distance:.2f} {self.current_length_unit}")
-
-                # Redraw areas
-                for polygon, area in self.areas:
-                    # Draws the area and text
-                    if self.delete_mode and polygon == self.delete_candidate:
-                        painter.setPen(QPen(Qt.yellow, self.line_width, Qt.SolidLine))  # Highlight in yellow
-                    else:
-                        painter.setPen(QPen(Qt.magenta, self.line_width, Qt.SolidLine))
-                    painter.setBrush(Qt.NoBrush)  # No fill
-                    painter.drawPolygon(polygon)
-                    mid_point = polygon.boundingRect().center()
-                    painter.setFont(QFont("Arial", self.text_size))
-                    painter.setPen(QPen(Qt.red))
-                    painter.drawText(mid_point, f"{area:.2f} {self.current_area_unit}")
-
-                    # Redraw points at the vertices of the polygon
-                    painter.setBrush(QBrush(Qt.red))  # Set brush for the points
-                    for point in polygon:
-                        painter.drawEllipse(point, self.point_size / 2, self.point_size / 2)  # Draw circles for vertices
-
-                # Draw current polygon in progress
-                if self.measure_area_mode and len(self.current_polygon) > 0:
-                    painter.setPen(QPen(Qt.cyan, self.line_width, Qt.SolidLine))
-                    for i in range(len(self.current_polygon) - 1):
-                        painter.drawLine(self.current_polygon[i], self.current_polygon[i + 1])
-                        painter.drawPoint(point)
-
-                    if self.orthographic_mode:
-                        if len(self.current_polygon) > 1:
-                            point = self.getOrthographicProjection(self.current_polygon[-2], self.current_polygon[-1])
-                            painter.drawLine(self.current_polygon[-2], point)
-                    else:
-                        painter.drawLine(self.current_polygon[-1], self.lastPoint)
-
-                    # Redraw points at the vertices of the polygon
-                    painter.setBrush(QBrush(Qt.red))  # Set brush for the points
-                    for point in self.current_polygon:
-                        painter.drawEllipse(point, self.point_size / 2, self.point_size / 2)  # Draw circles for vertices
-
-
-
-
-            self.annotation_pixmapItem.setPixmap(QPixmap.fromImage(temp_image))
-
-        elif self.tabs.currentIndex() == 1:
-            # DIGITIZATION TAB
-
-            painter = QPainter(temp_image)
-            # Draw x and y axes
-            if self.x_axis:
-                painter.setPen(QPen(self.axis_color, self.line_width, Qt.SolidLine))
-                painter.drawLine(self.x_axis[0], self.x_axis[1])
-                self.drawArrow(painter, self.x_axis[0], self.x_axis[1])
-                painter.setFont(QFont("Arial", self.text_size))
-                painter.setPen(QPen(self.axis_text_color))
-                painter.drawText(self.x_axis[1], f"X: {self.xmin} to {self.xmax}")
-            if self.y_axis:
-                painter.setPen(QPen(self.axis_color, self.line_width, Qt.SolidLine))
-                painter.drawLine(self.y_axis[0], self.y_axis[1])
-                self.drawArrow(painter, self.y_axis[0], self.y_axis[1])
-                painter.setFont(QFont("Arial", self.text_size))
-                painter.setPen(QPen(self.axis_text_color))
-                painter.drawText(self.y_axis[1], f"Y: {self.ymin} to {self.ymax}")
-
-            # Draw digitized points
-            for original_point, x, y in self.digitized_points:
-                if (self.delete_point_mode and self.delete_point_candidate == (original_point, x, y)) or \
-                   (self.selected_point == (original_point, x, y)):
-                    painter.setPen(QPen(Qt.yellow, self.point_size, Qt.SolidLine))  # Highlight in yellow
-                elif any(selected == (original_point, x, y) for selected in self.selected_points):
-                    painter.setPen(QPen(Qt.green, self.point_size, Qt.SolidLine))  # Highlight selected points in green
-                else:
-                    painter.setPen(QPen(self.point_color, self.point_size, Qt.SolidLine))
-                painter.drawPoint(original_point)
-                if self.text_labels_visible:
-                    painter.setFont(QFont("Arial", self.text_size))
-                    painter.setPen(QPen(self.label_color))
-                    painter.drawText(original_point, f"({x:.2f}, {y:.2f})")
-
-            # Draw current axis line in progress
-            if self.picking_axes_points and len(self.current_axes_points) == 1:
-                painter.setPen(QPen(self.axis_color, self.line_width, Qt.DashLine))
-                painter.drawLine(self.current_axes_points[0], self.lastPoint)
-            elif self.picking_axes_points and len(self.current_axes_points) == 3:
-                painter.setPen(QPen(self.axis_color, self.line_width, Qt.DashLine))
-                painter.drawLine(self.current_axes_points[2], self.lastPoint)
-
-            self.digitize_pixmapItem.setPixmap(QPixmap.fromImage(temp_image))
-
-        painter.end()
+    def updateView(self):
+        '''Restyle every annotation item, after a change that affects them all (sizes, colours, axes).'''
+        self.updateCalibrationItems()
+        for marker in self.measurement_point_items:
+            self.sizeMarker(marker)
+        for i in range(len(self.measurements)):
+            self.styleMeasurement(i)
+        for i in range(len(self.areas)):
+            self.styleArea(i)
+        self.updatePolygonPreview()
+        self.updateAxisItems()
+        for i in range(len(self.digitized_points)):
+            self.styleDigitizedPoint(i)
+        self.updateLevelOfDetail()
+
+    def updateLevelOfDetail(self):
+        '''
+        Show or hide the layers for the toggles and the zoom of each view.
+        Labels and vertex markers are hidden while they would be too small
+        to see, so a zoomed-out frame does not draw thousands of specks.
+        '''
+        label_height = QFontMetricsF(QFont("Arial", self.text_size)).height()
+        annotation_scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(self.annotation_view.transform())
+        digitize_scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(self.digitize_view.transform())
+        self.annotation_layer.setVisible(self.annotations_visible)
+        self.annotation_label_layer.setVisible(self.annotations_visible and label_height * annotation_scale >= MIN_LABEL_PX)
+        self.marker_layer.setVisible(self.annotations_visible and self.point_size * annotation_scale >= MIN_MARKER_PX)
+        self.label_layer.setVisible(self.text_labels_visible and label_height * digitize_scale >= MIN_LABEL_PX)
 
     def handleWheelEvent(self, event, source):
         if isinstance(source, QGraphicsView):
             zoom_factor = 1.25 if event.angleDelta().y() > 0 else 0.8
             source.scale(zoom_factor, zoom_factor)
+            self.updateLevelOfDetail()
 
     def zoomIn(self):
         if self.tabs.currentIndex() == 0:
             self.annotation_view.scale(1.25, 1.25)
         else:
             self.digitize_view.scale(1.25, 1.25)
+        self.updateLevelOfDetail()
 
     def zoomOut(self):
         if self.tabs.currentIndex() == 0:
             self.annotation_view.scale(0.8, 0.8)
         else:
             self.digitize_view.scale(0.8, 0.8)
+        self.updateLevelOfDetail()
 
     def zoomSliderChanged(self, value):
         scale_factor = value / 100.0
@@ -839,6 +1253,7 @@ class ImageViewer(QMainWindow):
         else:
             self.digitize_view.resetTransform()
             self.digitize_view.scale(scale_factor, scale_factor)
+        self.updateLevelOfDetail()
 
     def drawAxes(self):
         self.digitize_mode = False
@@ -846,7 +1261,9 @@ class ImageViewer(QMainWindow):
         self.delete_point_mode = False
         self.picking_axes_points = True
         self.current_axes_points.clear()
-        self.updateView()
+        self.setDeleteCandidate(None)
+        self.setDeletePointCandidate(None)
+        self.updateAxisPreview()
 
     def digitizePoints(self):
         self.digitize_mode = not self.digitize_mode
@@ -854,7 +1271,8 @@ class ImageViewer(QMainWindow):
         self.delete_point_mode = False
         self.digitizePointsButton.setChecked(self.digitize_mode)
         self.deletePointsButton.setChecked(False)
-        self.updateView()
+        self.setDeleteCandidate(None)
+        self.setDeletePointCandidate(None)
 
     def convertToCoordinates(self, point):
         if self.x_axis and self.y_axis:
@@ -906,7 +1324,8 @@ class ImageViewer(QMainWindow):
             self.pointsTable.setItem(i, 0, QTableWidgetItem(f"{x:.2f}"))
             self.pointsTable.setItem(i, 1, QTableWidgetItem(f"{y:.2f}"))
 
-    def drawArrow(self, painter, p1, p2):
+    def arrowPath(self, p1, p2):
+        '''The line from p1 to p2 with an arrowhead at p2.'''
         arrow_size = 10
         line_angle = math.atan2(p2.y() - p1.y(), p2.x() - p1.x())
         
@@ -919,8 +1338,12 @@ class ImageViewer(QMainWindow):
             p2.y() - arrow_size * math.sin(line_angle + math.pi / 6)
         )
 
-        painter.drawLine(p2, arrow_p1)
-        painter.drawLine(p2, arrow_p2)
+        path = QPainterPath(p1)
+        path.lineTo(p2)
+        path.lineTo(arrow_p1)
+        path.moveTo(p2)
+        path.lineTo(arrow_p2)
+        return path
 
     def updateColors(self):
         color_map = {
@@ -957,7 +1380,10 @@ class ImageViewer(QMainWindow):
         else:
             self.measure_area_mode = False
             self.delete_mode = False
-        self.updateView()
+        self.setDeleteCandidate(None)
+        self.setDeletePointCandidate(None)
+        self.updatePolygonPreview()
+        self.updateAxisPreview()
 
     def updateLengthUnit(self, unit):
         self.current_length_unit = unit
@@ -1006,7 +1432,7 @@ class ImageViewer(QMainWindow):
 
     def toggleOrthographicMode(self, checked):
         self.orthographic_mode = checked
-        self.updateView()
+        self.updatePolygonPreview()
 
     def getOrthographicProjection(self, last_point, current_point):
         dx = current_point.x() - last_point.x()
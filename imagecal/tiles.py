@@ -0,0 +1,179 @@
+'''
+Tiled image display for the Image Annotation and Digitization Tool.
+
+A scanned drawing is decoded once. ImagePyramid cuts it into tiles and
+keeps successively halved copies of it (a mip pyramid), reduced tile by
+tile as the views need them. TiledImageItem draws only the tiles that intersect the
+exposed part of the view, from the level that matches the current zoom,
+so a zoomed-out view of a 100+ megapixel scan reads a few small tiles.
+Tiles become QPixmaps on first use and are kept in a TileCache, an LRU
+cache bounded in bytes that every view shares.
+
+'''
+
+import math
+from collections import OrderedDict
+
+from PySide6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PySide6.QtGui import QImage, QPainter, QPixmap
+from PySide6.QtCore import Qt, QRect, QRectF
+
+
+# Edge of a square tile, in pixels of its level
+TILE_SIZE = 512
+
+# Upper bound on the bytes of tile pixmaps kept by a TileCache
+CACHE_BYTES = 256 * 2**20
+
+
+class ImagePyramid:
+    '''
+    An image and its copies at 1/2, 1/4, ... of its size, down to one that
+    fits in a single tile, cut into square tiles. Level 0 tiles are cut
+    straight from the image. A tile of any other level is the (up to) four
+    tiles under it in the level before, halved; it is made the first time it
+    is needed and kept. Only the parts of the drawing that are viewed get
+    reduced, a few milliseconds a tile, where halving a whole 100 megapixel
+    image at once takes seconds.
+    '''
+
+    def __init__(self, image, tile_size=TILE_SIZE):
+        self.image = image
+        self.tile_size = tile_size
+        self.width = image.width()
+        self.height = image.height()
+        self.sizes = [(self.width, self.height)]  # Pixels of each level
+        while max(self.sizes[-1]) > tile_size:
+            w, h = self.sizes[-1]
+            self.sizes.append((math.ceil(w / 2), math.ceil(h / 2)))
+        self.depth = len(self.sizes) - 1  # Index of the last level
+        self.reduced = {}  # (level, column, row) -> tile QImage, for levels above 0
+
+    def levelFor(self, scale):
+        '''The coarsest level that still has at least one pixel per screen pixel at this zoom.'''
+        if scale >= 1:
+            return 0
+        return min(int(math.floor(math.log2(1 / scale))), self.depth)
+
+    def tileCount(self, k):
+        w, h = self.sizes[k]
+        return math.ceil(w / self.tile_size), math.ceil(h / self.tile_size)
+
+    def tileRect(self, k, column, row):
+        '''Pixels of tile (column, row) in level k.'''
+        rect = QRect(column * self.tile_size, row * self.tile_size, self.tile_size, self.tile_size)
+        return rect.intersected(QRect(0, 0, *self.sizes[k]))
+
+    def tileImage(self, k, column, row):
+        if k == 0:
+            return self.image.copy(self.tileRect(0, column, row))
+        tile = self.reduced.get((k, column, row))
+        if tile is None:
+            tile = self.reduce(k, column, row)
+            self.reduced[(k, column, row)] = tile
+        return tile
+
+    def reduce(self, k, column, row):
+        '''Tile (column, row) of level k, halved from the tiles under it in level k - 1.'''
+        rect = self.tileRect(k, column, row)
+        # Odd sized levels round up, so the last row or column may be short by a pixel
+        source_rect = QRect(rect.x() * 2, rect.y() * 2, rect.width() * 2, rect.height() * 2)
+        source_rect = source_rect.intersected(QRect(0, 0, *self.sizes[k - 1]))
+        if k == 1:
+            source = self.image.copy(source_rect)
+        else:
+            source = QImage(source_rect.size(), QImage.Format_ARGB32_Premultiplied)
+            source.fill(Qt.transparent)
+            painter = QPainter(source)
+            columns, rows = self.tileCount(k - 1)
+            for child_row in range(2 * row, min(2 * row + 2, rows)):
+                for child_column in range(2 * column, min(2 * column + 2, columns)):
+                    child_rect = self.tileRect(k - 1, child_column, child_row)
+                    painter.drawImage(child_rect.topLeft() - source_rect.topLeft(),
+                                      self.tileImage(k - 1, child_column, child_row))
+            painter.end()
+        return source.scaled(rect.width(), rect.height(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+
+class TileCache:
+    '''Least recently used tile pixmaps, keyed by (pyramid, level, column, row), bounded in bytes.'''
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict()
+        self.bytes = 0
+
+    def get(self, pyramid, k, column, row):
+        key = (id(pyramid), k, column, row)
+        pixmap = self.tiles.get(key)
+        if pixmap is not None:
+            self.tiles.move_to_end(key)
+            return pixmap
+
+        pixmap = QPixmap.fromImage(pyramid.tileImage(k, column, row))
+        self.tiles[key] = pixmap
+        self.bytes += self.size(pixmap)
+        # The newest tile always stays, even if it alone is over the limit
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.bytes -= self.size(evicted)
+        return pixmap
+
+    def size(self, pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def clear(self):
+        self.tiles.clear()
+        self.bytes = 0
+
+
+class TiledImageItem(QGraphicsItem):
+    '''
+    Scene item showing an ImagePyramid at its full size in scene
+    coordinates (one unit per image pixel), drawn tile by tile.
+    '''
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pyramid = None
+        # Paint is given the exposed rect, so only the tiles under it are drawn
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def setPyramid(self, pyramid):
+        self.prepareGeometryChange()
+        self.pyramid = pyramid
+        self.update()
+
+    def boundingRect(self):
+        if self.pyramid is None:
+            return QRectF()
+        return QRectF(0, 0, self.pyramid.width, self.pyramid.height)
+
+    def paint(self, painter, option, widget=None):
+        if self.pyramid is None:
+            return
+        pyramid = self.pyramid
+        k = pyramid.levelFor(QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()))
+        # Scene units per pixel of this level
+        sx = pyramid.width / pyramid.sizes[k][0]
+        sy = pyramid.height / pyramid.sizes[k][1]
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if painter.hasClipping():
+            # QGraphicsScene.render() exposes the whole item and clips to the target instead
+            exposed = exposed.intersected(painter.clipBoundingRect())
+        if exposed.isEmpty():
+            return
+
+        span = pyramid.tile_size
+        columns, rows = pyramid.tileCount(k)
+        first_column = max(int(exposed.left() / sx) // span, 0)
+        last_column = min(int(exposed.right() / sx) // span, columns - 1)
+        first_row = max(int(exposed.top() / sy) // span, 0)
+        last_row = min(int(exposed.bottom() / sy) // span, rows - 1)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                rect = pyramid.tileRect(k, column, row)
+                target = QRectF(rect.x() * sx, rect.y() * sy, rect.width() * sx, rect.height() * sy)
+                pixmap = self.cache.get(pyramid, k, column, row)
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
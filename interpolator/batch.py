@@ -0,0 +1,174 @@
+'''
+Batch mode for the DataFit & Interpolation Tool.
+
+Resamples many CSV/XLSX series without the GUI, fanning the files out over a
+process pool so every core is used. Each resample is streamed to its output
+file chunk by chunk, so memory does not grow with the number of output points.
+
+Example:
+    python batch.py data/*.csv --method "Smoothing Spline" --dx 0.1 --output-dir out
+
+'''
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import engine
+import exporters
+import loaders
+
+
+INPUT_EXTENSIONS = ('.csv',) + loaders.EXCEL_EXTENSIONS + loaders.BINARY_EXTENSIONS
+
+
+def read_series(path, x_col=None, y_cols=None, dtype='<f8', columns=2, weight_col=None):
+    '''
+    Read the x column, one or more y columns and optionally a weight column
+    from a CSV/XLSX/binary file in one pass. Defaults to the first two
+    columns. Returns (x, y, weights); y is 2-D (rows, series) when several
+    y columns are given, and weights is None without weight_col.
+    '''
+    y_cols = list(y_cols or [None])
+    cols = [x_col] + y_cols + ([] if weight_col is None else [weight_col])
+    arrays = loaders.load_columns(path, cols, dtype=dtype, columns=columns)
+
+    # Drop rows with blank or invalid data, as the GUI does
+    valid = ~np.logical_or.reduce([np.isnan(a) for a in arrays])
+    arrays = [a[valid] for a in arrays]
+    ys = arrays[1:1 + len(y_cols)]
+    y = ys[0] if len(ys) == 1 else np.column_stack(ys)
+    weights = arrays[-1] if weight_col is not None else None
+    return arrays[0], y, weights
+
+
+def output_path(path, output_dir, fmt='csv'):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, f"{stem}-resampled.{fmt}")
+
+
+def output_columns(y_cols):
+    if not y_cols or len(y_cols) == 1:
+        return ["X", "Y (Fitted)"]
+    return ["X"] + [f"{col} (Fitted)" for col in y_cols]
+
+
+def process_file(path, method, dx, output_dir, x_col=None, y_cols=None, fmt='csv', precision=None,
+                 dtype='<f8', columns=2, lam=None, weight_col=None, duplicates=None,
+                 degree=3, grid=None, log_points=None):
+    '''
+    Fit and resample one file, all of its y columns together. Runs in a worker
+    process. The fit is sampled on the target grid if one is given, else on
+    log_points log-spaced points, else every dx.
+    '''
+    x, y, weights = read_series(path, x_col, y_cols, dtype, columns, weight_col)
+    if dx is None and grid is None and log_points is None:
+        dx = engine.default_dx(x)
+    params = {'duplicates': duplicates}
+    if method == 'Smoothing Spline':
+        params.update(lam=lam, weights=weights)
+    elif method == 'Polynomial Regression':
+        params['degree'] = degree
+    model = engine.fit(x, y, method, **params)
+
+    out_path = output_path(path, output_dir, fmt)
+    if log_points is not None:
+        grid = engine.log_grid(np.min(model.x), np.max(model.x), log_points)
+    if grid is not None:
+        rows = len(grid)
+    else:
+        rows = engine.grid_size(np.min(model.x), np.max(model.x), dx)
+    with exporters.open_writer(out_path, output_columns(y_cols), rows, precision) as writer:
+        if grid is not None:
+            engine.stream_grid(model, grid, [writer])
+        else:
+            engine.stream_resample(model, dx, [writer])
+    return out_path, rows
+
+
+def expand_inputs(inputs):
+    '''Expand directories into the CSV/XLSX files they contain.'''
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.lower().endswith(INPUT_EXTENSIONS):
+                    paths.append(os.path.join(item, name))
+        else:
+            paths.append(item)
+    return paths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch fit and resample CSV/XLSX/binary series.")
+    parser.add_argument('inputs', nargs='+', help="Input files or directories")
+    parser.add_argument('--method', choices=engine.METHODS, default='Linear Regression')
+    sampling = parser.add_mutually_exclusive_group()
+    sampling.add_argument('--dx', type=float, default=None,
+                          help="Sampling interval (default: mean spacing of each series)")
+    sampling.add_argument('--grid', default=None,
+                          help="Sample at these X values instead, e.g. \"0.5,1,2,5\"")
+    sampling.add_argument('--grid-file', default=None,
+                          help="Sample at the X values in this CSV/XLSX/binary file instead")
+    sampling.add_argument('--log-points', type=int, default=None,
+                          help="Sample at this many log-spaced points over each series instead")
+    parser.add_argument('--grid-col', default=None,
+                        help="Column of --grid-file holding the X values (default: first column)")
+    parser.add_argument('--x-col', default=None, help="X column name or index (default: first column)")
+    parser.add_argument('--y-col', nargs='+', default=None,
+                        help="Y column names or indices, fitted together against X (default: second column)")
+    parser.add_argument('--lam', type=float, default=None,
+                        help="Smoothing factor for the smoothing spline (default: chosen by GCV)")
+    parser.add_argument('--degree', type=int, default=3, help="Degree for polynomial regression (default: 3)")
+    parser.add_argument('--weight-col', default=None,
+                        help="Column of per-point weights for the smoothing spline")
+    parser.add_argument('--duplicates', choices=engine.DUPLICATE_REDUCERS, default=None,
+                        help="Combine points sharing an X value (default: keep them all)")
+    parser.add_argument('--dtype', default='<f8', help="Value type of raw binary inputs (default: <f8)")
+    parser.add_argument('--columns', type=int, default=2, help="Values per record in raw binary inputs")
+    parser.add_argument('--output-dir', default='.', help="Directory for the resampled files")
+    parser.add_argument('--format', default='csv', choices=[ext[1:] for ext in exporters.available_formats()],
+                        help="Output file format")
+    parser.add_argument('--precision', type=int, default=None,
+                        help="Decimal places for CSV output (default: full precision)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help="Number of worker processes (default: all cores)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = expand_inputs(args.inputs)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # One target grid shared by every file
+    grid = None
+    if args.grid is not None:
+        grid = engine.parse_grid(args.grid)
+    elif args.grid_file is not None:
+        grid = engine.target_grid(loaders.load_grid(args.grid_file, args.grid_col))
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(process_file, path, args.method, args.dx, args.output_dir,
+                               args.x_col, args.y_col, args.format, args.precision,
+                               args.dtype, args.columns, args.lam, args.weight_col,
+                               args.duplicates, args.degree, grid, args.log_points): path
+                   for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                out_path, n = future.result()
+                print(f"{path} -> {out_path} ({n} rows)")
+            except Exception as e:
+                failures += 1
+                print(f"{path}: error - {e}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+'''
+Benchmarks for the DataFit & Interpolation Tool.
+
+Times every fitting method (fit and resample) and the GUI paths that scale
+with the data (paste, output table, plot update, canvas draw, CSV export)
+over a range of input sizes. Qt runs on the offscreen platform, so no display
+is needed. Results are written as JSON; pass a previous results file to
+--compare to flag regressions.
+
+Examples:
+    python bench.py --output results.json
+    python bench.py --sizes 1e2 1e4 1e6 --compare results.json --output new.json
+
+'''
+
+import os
+# Must be set before Qt is imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import engine
+import exporters
+
+
+DEFAULT_SIZES = [10**k for k in range(2, 8)]
+
+# A run is flagged when its median time grows by more than this factor
+REGRESSION_RATIO = 1.25
+
+
+def make_data(n, seed=0):
+    '''Noisy sine over unsorted x, the same for every run.'''
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, 100, n)
+    y = np.sin(x / 5) + rng.normal(0, 0.1, n)
+    return x, y
+
+
+class Bench:
+    def __init__(self, repeat=3, verbose=True):
+        self.repeat = repeat
+        self.verbose = verbose
+        self.results = []
+
+    def run(self, name, size, fn, method=None, setup=None):
+        '''
+        Time fn() (after setup(), if given, before every run) and record it. One
+        untimed run first keeps imports and cold caches out of the numbers.
+        '''
+        def once():
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            return time.perf_counter() - start
+        try:
+            once()
+            times = [once() for _ in range(self.repeat)]
+        except MemoryError:
+            times = None
+        result = {'benchmark': name, 'method': method, 'size': size}
+        if times is None:
+            result['error'] = 'MemoryError'
+        else:
+            result['seconds'] = float(np.median(times))
+            result['min'] = float(min(times))
+        self.results.append(result)
+        if self.verbose:
+            label = f"{name}" + (f" [{method}]" if method else "")
+            value = result.get('error') or f"{result['seconds'] * 1000:10.2f} ms"
+            print(f"{label:40s} {size:>10d}  {value}", flush=True)
+
+
+def bench_engine(bench, sizes, methods):
+    for n in sizes:
+        x, y = make_data(n)
+        dx = (x.max() - x.min()) / n  # about n resampled points
+        for method in methods:
+            bench.run('fit', n, lambda: engine.fit(x, y, method), method)
+            model = engine.fit(x, y, method)
+            bench.run('resample', n, lambda: model.resample(dx), method)
+
+
+def bench_gui(bench, sizes, workdir):
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    import interpolator
+
+    window = interpolator.MainWindow()
+    window.show()
+    window.setup_plot()
+    app.processEvents()
+    clipboard = QApplication.clipboard()
+
+    for n in sizes:
+        x, y = make_data(n)
+        x.sort()
+
+        # Paste: clipboard text -> parsed block in the input table
+        text = "\n".join(f"{a!r}\t{b!r}" for a, b in zip(x.tolist(), y.tolist())) + "\n"
+        clipboard.setText(text)
+        window.input_table.setCurrentIndex(window.input_model.index(0, 0))
+        bench.run('paste', n, window.input_table.paste,
+                  setup=lambda: window.input_model.clear(rows=10))
+        del text
+
+        # Output table: model reset plus painting the visible rows
+        def table():
+            window.output_model.set_columns([x, y])
+            window.output_table.viewport().repaint()
+        bench.run('table', n, table)
+
+        # Plot: rebuilding the decimated series, then a full canvas draw
+        def plot():
+            window.data_line.set_series(x, y)
+            window.fitted_line.set_series(x, y)
+        bench.run('plot', n, plot)
+        window.data_line.line.set_visible(True)
+        window.fitted_line.line.set_visible(True)
+        bench.run('draw', n, window.redraw)
+
+        path = os.path.join(workdir, 'export.csv')
+        bench.run('export csv', n, lambda: exporters.export_arrays(path, [x, y], ["X", "Y (Fitted)"]))
+        os.remove(path)
+
+    window.close()
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    import scipy
+    import matplotlib
+    import PySide6
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'matplotlib': matplotlib.__version__,
+        'pyside6': PySide6.__version__,
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_RATIO):
+    '''Print new/old time ratios; return the number of regressions.'''
+    def key(r):
+        return r['benchmark'], r.get('method'), r['size']
+    old = {key(r): r for r in baseline['results'] if 'seconds' in r}
+    regressions = 0
+    print(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'} "
+          f"({baseline['environment'].get('date', '?')}):")
+    for r in results:
+        before = old.get(key(r))
+        if before is None or 'seconds' not in r:
+            continue
+        ratio = r['seconds'] / before['seconds'] if before['seconds'] > 0 else float('inf')
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        label = r['benchmark'] + (f" [{r['method']}]" if r.get('method') else "")
+        print(f"{label:40s} {r['size']:>10d}  {before['seconds'] * 1000:10.2f} -> "
+              f"{r['seconds'] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the interpolator across data sizes.")
+    parser.add_argument('--sizes', type=float, nargs='+', default=DEFAULT_SIZES,
+                        help="Input sizes (default: 1e2 .. 1e7)")
+    parser.add_argument('--methods', nargs='+', choices=engine.METHODS, default=engine.METHODS)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement; the median is kept")
+    parser.add_argument('--skip-gui', action='store_true', help="Only benchmark the fitting engine")
+    parser.add_argument('--skip-engine', action='store_true', help="Only benchmark the GUI paths")
+    parser.add_argument('--output', default=None, help="Write results to this JSON file")
+    parser.add_argument('--compare', default=None, help="Baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_RATIO,
+                        help="Slowdown ratio reported as a regression (default: 1.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = sorted(int(s) for s in args.sizes)
+    bench = Bench(args.repeat)
+
+    if not args.skip_engine:
+        bench_engine(bench, sizes, args.methods)
+    if not args.skip_gui:
+        with tempfile.TemporaryDirectory() as workdir:
+            bench_gui(bench, sizes, workdir)
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': bench.results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(bench.results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+'''
+Bootstrap confidence bands for the DataFit & Interpolation Tool.
+
+band() refits the data many times and takes pointwise quantiles of the
+refitted curves on a grid.
+
+Regression, polynomial and smoothing spline fits are linear in y once their
+settings are fixed (the smoothing spline keeps the lambda GCV chose for the
+data). They use a residual bootstrap: every replicate is the fitted values
+plus resampled residuals, and a whole batch of replicates is solved as extra
+right-hand sides of one least-squares or banded solve.
+
+The interpolating methods pass through every point, so they have no
+residuals. For them the (x, y) pairs themselves are resampled, and each
+replicate is a separate fit, spread over a process pool.
+
+'''
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+import engine
+
+
+# Methods whose fitted values are linear in y, bootstrapped by batched solves
+LINEAR_METHODS = ('Linear Regression', 'Polynomial Regression', 'Smoothing Spline')
+
+# Curves are evaluated on at most this many grid points, then interpolated onto the full grid
+BAND_POINTS = 2000
+
+# Upper bound on points x replicates held at once in a batched refit; larger
+# batches spend more on fresh memory than they save in solver calls
+BATCH_VALUES = 2_000_000
+
+# Replicates per process pool task
+TASK_REPLICATES = 50
+
+
+def band(x, y, method, grid, replicates=1000, level=0.95, seed=None, processes=None, progress=None,
+         **params):
+    '''
+    Pointwise bootstrap confidence band (lower, upper) of the fitted curve
+    of y(x) on grid, from the given number of replicates. y is a single
+    series. processes=None uses every core for the interpolating methods;
+    progress(done, total) may raise to cancel.
+    '''
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    grid = np.asarray(grid, dtype=float)
+    if y.ndim != 1:
+        raise ValueError("Confidence bands are computed for one series at a time.")
+    if not 0 < level < 1:
+        raise ValueError("Confidence level must be between 0 and 1.")
+
+    # The band is smooth enough to evaluate on a subset of a fine grid
+    points = grid
+    if len(grid) > BAND_POINTS:
+        points = grid[np.linspace(0, len(grid) - 1, BAND_POINTS).round().astype(int)]
+
+    if method in LINEAR_METHODS:
+        curves = residual_curves(x, y, method, points, replicates, seed, progress, **params)
+    else:
+        curves = pairs_curves(x, y, method, points, replicates, seed, processes, progress, **params)
+
+    # Pairs replicates leave out the grid beyond their own data range (NaN);
+    # points no replicate reached get no band
+    lower = np.full(len(points), np.nan)
+    upper = np.full(len(points), np.nan)
+    covered = ~np.isnan(curves).all(axis=1)
+    if not covered.any():
+        # No replicate reached the grid: no band anywhere
+        return np.full(len(grid), np.nan), np.full(len(grid), np.nan)
+    lower[covered], upper[covered] = np.nanquantile(curves[covered], [(1 - level) / 2, (1 + level) / 2], axis=1)
+    if points is not grid:
+        lower = np.interp(grid, points, lower)
+        upper = np.interp(grid, points, upper)
+    return lower, upper
+
+
+def residual_curves(x, y, method, points, replicates, seed=None, progress=None, **params):
+    '''Replicate curves on points, shape (points, replicates), by residual bootstrap.'''
+    model = engine.fit(x, y, method, **params)
+    # The model's data is sorted and has duplicates combined if that was asked for
+    x, y = model.x, model.y
+    fitted = model.evaluate(x)
+    residuals = y - fitted
+    residuals -= residuals.mean()
+
+    params.pop('duplicates', None)
+    if method == 'Smoothing Spline':
+        params = {'lam': model.spline.lam, 'weights': model.spline.w}
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(replicates, BATCH_VALUES // len(x)))
+    curves = np.empty((len(points), replicates))
+    for start in range(0, replicates, batch):
+        stop = min(start + batch, replicates)
+        Y = fitted[:, None] + residuals[rng.integers(0, len(x), (len(x), stop - start))]
+        curves[:, start:stop] = batch_curves(model, Y, points, **params)
+        if progress is not None:
+            progress(stop, replicates)
+    return curves
+
+
+def batch_curves(model, Y, points, **params):
+    '''Refit model's method to every column of Y in one solve; curves on points, (points, columns).'''
+    if isinstance(model, engine.PolynomialRegressionFit):
+        # One least-squares solve in the model's basis, every replicate a right-hand
+        # side. The blocked QR would carry all of them through every block.
+        basis = np.polynomial.chebyshev.chebvander(model.scale(model.x), model.degree)
+        coef = np.linalg.lstsq(basis, Y, rcond=None)[0]
+        return np.polynomial.chebyshev.chebval(model.scale(points), coef).T
+    # Replicates are only evaluated on points, so they skip the plotted curve
+    return engine.FITTERS[model.method](model.x, Y, curve=False, **params).evaluate(points)
+
+
+def pairs_curves(x, y, method, points, replicates, seed=None, processes=None, progress=None, **params):
+    '''Replicate curves on points, shape (points, replicates), by resampling (x, y) pairs.'''
+    # Resampling with replacement repeats x values, which interpolants cannot take
+    duplicates = params.pop('duplicates', None) or 'mean'
+    seeds = np.random.SeedSequence(seed).spawn(-(-replicates // TASK_REPLICATES))
+    counts = [TASK_REPLICATES] * (len(seeds) - 1) + [replicates - TASK_REPLICATES * (len(seeds) - 1)]
+    tasks = [(x, y, method, duplicates, params, points, s, n) for s, n in zip(seeds, counts)]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) == 1:
+        results = []
+        for task in tasks:
+            results.append(_pairs_task(*task))
+            if progress is not None:
+                progress(sum(r.shape[1] for r in results), replicates)
+        return np.hstack(results)
+
+    # spawn, not fork: the caller may be a threaded GUI process
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(_pairs_task, *task): i for i, task in enumerate(tasks)}
+        results = [None] * len(tasks)
+        pending = set(futures)
+        done_count = 0
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+                    done_count += results[futures[future]].shape[1]
+                if progress is not None:
+                    progress(done_count, replicates)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return np.hstack(results)
+
+
+def _pairs_task(x, y, method, duplicates, params, points, seed, count):
+    '''count pairs-bootstrap refits, as curves on points. Runs in a worker process.'''
+    rng = np.random.default_rng(seed)
+    curves = np.full((len(points), count), np.nan)
+    for k in range(count):
+        idx = rng.integers(0, len(x), len(x))
+        xs, ys, _ = engine.collapse_duplicates(x[idx], y[idx], duplicates)
+        # A replicate says nothing beyond its own x range; splines would extrapolate wildly there
+        inside = (points >= xs[0]) & (points <= xs[-1])
+        curves[inside, k] = engine.FITTERS[method](xs, ys, curve=False, **params).evaluate(points[inside])
+    return curves
@@ -0,0 +1,782 @@
+'''
+Fitting engine for the DataFit & Interpolation Tool.
+
+All of the fitting and resampling math lives here, free of any Qt imports,
+so it can be driven by the GUI (interpolator.py) or headless by the batch
+command-line tool (batch.py). Everything works on NumPy arrays.
+
+y may be 1-D, or 2-D with one column per series sharing the same x. Every
+method fits all of the series in one batched call (one lstsq with several
+right-hand sides, one shared sort/searchsorted index, one spline solve).
+
+SciPy is only imported when a spline is first fitted, so the linear methods
+and the GUI start without it.
+
+'''
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import profiling
+
+
+# Number of grid points evaluated per step when reporting progress
+CHUNK_SIZE = 250_000
+
+# Rows per block of the polynomial QR; small blocks stay in cache and are much
+# faster for LAPACK than one tall matrix
+QR_BLOCK = 4096
+
+
+class Fit:
+    '''
+    A fitted model over (x, y). Subclasses fill in the plotted curve
+    (x_fitted, y_fitted), the label text shown in the GUI, and evaluate().
+    evaluate() returns one column per series when y is 2-D. curve=False
+    skips the plotted curve (it stays the data), for fits that are only
+    evaluated, such as bootstrap replicates.
+    '''
+    method = None
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.x_fitted = x
+        self.y_fitted = y
+        self.label = ""
+
+    @property
+    def series(self):
+        return 1 if self.y.ndim == 1 else self.y.shape[1]
+
+    def evaluate(self, x):
+        raise NotImplementedError
+
+    def resample(self, dx, progress=None):
+        sampled_x = sample_grid(self.x, dx)
+        return sampled_x, self.evaluate_chunked(sampled_x, progress)
+
+    def evaluate_chunked(self, x, progress=None, chunk_size=None):
+        '''
+        evaluate() in fixed-size chunks, calling progress(done, total) after
+        each one. The callback may raise to abort (e.g. on cancellation).
+        '''
+        if progress is None:
+            return self.evaluate(x)
+        chunk_size = chunk_size or CHUNK_SIZE
+        y = np.empty((len(x),) + self.y.shape[1:])
+        for start in range(0, len(x), chunk_size):
+            stop = min(start + chunk_size, len(x))
+            y[start:stop] = self.evaluate(x[start:stop])
+            progress(stop, len(x))
+        return y
+
+
+class LinearRegressionFit(Fit):
+    '''
+    Least-squares line. coefficients=(slope, intercept) skips the solve and
+    domain=(min x, max x) the scan for the ends of the curve (see LiveFit).
+    '''
+    method = 'Linear Regression'
+
+    def __init__(self, x, y, coefficients=None, domain=None, curve=True):
+        super().__init__(x, y)
+        if coefficients is None:
+            A = np.vstack([x, np.ones(len(x))]).T
+            # Every series is a right-hand side of the same least-squares problem
+            coefficients = np.linalg.lstsq(A, y, rcond=None)[0]
+        self.slope, self.intercept = coefficients
+        if curve:
+            # A straight line: its two ends are the whole curve
+            self.x_fitted = np.array(domain if domain is not None else [np.min(x), np.max(x)], dtype=float)
+            self.y_fitted = self.evaluate(self.x_fitted)
+        self.label = (f"Coefficients: Slope = {format_values(self.slope)}, "
+                      f"Intercept = {format_values(self.intercept)}")
+
+    def evaluate(self, x):
+        return np.multiply.outer(x, self.slope) + self.intercept
+
+
+class PolynomialRegressionFit(Fit):
+    '''
+    Least-squares polynomial of the given degree. x is mapped onto [-1, 1]
+    and the basis is Chebyshev polynomials there, which keeps the problem
+    well conditioned at high degree on any x range.
+
+    The fit comes from a single QR factorisation of [basis | y], built up
+    over row blocks (each block is stacked under the previous R and
+    refactored), so memory stays O(block * degree) however many points
+    there are. The
+    first j + 1 columns of that R are the R of the degree-j problem, so the
+    residuals of every lower degree come from the same factorisation: see
+    rss and rmse, one row per degree 0..degree.
+    '''
+    method = 'Polynomial Regression'
+
+    def __init__(self, x, y, degree=3, curve=True):
+        super().__init__(x, y)
+        degree = int(degree)
+        if degree < 0:
+            raise ValueError("Polynomial degree cannot be negative.")
+        self.degree = degree
+        self.domain = np.array([np.min(x), np.max(x)])
+        if self.domain[0] == self.domain[1]:
+            raise ValueError("Polynomial regression needs more than one distinct X value.")
+
+        Y = y.reshape(len(x), -1)
+        p = degree + 1
+        R = np.zeros((0, p + Y.shape[1]))
+        for start in range(0, len(x), QR_BLOCK):
+            stop = min(start + QR_BLOCK, len(x))
+            block = np.hstack([np.polynomial.chebyshev.chebvander(self.scale(x[start:stop]), degree),
+                               Y[start:stop]])
+            R = np.linalg.qr(np.vstack([R, block]), mode='r')
+
+        R11, Qty = R[:p, :p], R[:p, p:]
+        if len(R) < p or (np.abs(np.diag(R11)) <= 1e-12 * np.abs(R11).max()).any():
+            raise ValueError(f"A degree {degree} polynomial needs at least {p} distinct X values.")
+        coef = np.linalg.solve(R11, Qty)
+        self.coef = coef.reshape((p,) + y.shape[1:])
+
+        # Residual of the full degree, plus what each dropped term would have explained
+        residual = (R[p:, p:]**2).sum(axis=0)
+        explained = np.cumsum((Qty**2)[::-1], axis=0)[::-1]
+        rss = residual + np.vstack([explained[1:], np.zeros((1, Y.shape[1]))])
+        self.rss = rss.reshape((p,) + y.shape[1:])
+        self.rmse = np.sqrt(self.rss / len(x))
+
+        if curve:
+            self.x_fitted = np.linspace(self.domain[0], self.domain[1], 5000)
+            with profiling.stage('fit curve', points=len(self.x_fitted)):
+                self.y_fitted = self.evaluate(self.x_fitted)
+        self.label = f"Polynomial (degree {degree}): RMSE = {format_values(self.rmse[degree], '%.4g')}"
+        if y.ndim == 1 and degree <= 5:
+            power = np.polynomial.Chebyshev(self.coef, domain=self.domain).convert(
+                kind=np.polynomial.Polynomial).coef
+            self.label += f", Coefficients (x^0 .. x^{degree}) = {format_values(power, '%.4g', limit=6)}"
+
+    def scale(self, x):
+        '''Map x from the data range onto [-1, 1].'''
+        lo, hi = self.domain
+        return (2 * x - (lo + hi)) / (hi - lo)
+
+    def evaluate(self, x):
+        # chebval puts the series first; the engine keeps them last
+        return np.polynomial.chebyshev.chebval(self.scale(x), self.coef).T
+
+    def degree_table(self):
+        '''Columns (degree, RMSE of each series) for degrees 0..degree.'''
+        rmse = self.rmse.reshape(len(self.rmse), -1)
+        return [np.arange(len(rmse), dtype=float)] + list(rmse.T)
+
+
+class LinearInterpolationFit(Fit):
+    method = 'Linear Interpolation'
+
+    def __init__(self, x, y, curve=True):
+        x, y = sort_xy(x, y)
+        super().__init__(x, y)
+        # The interpolant passes through every point, so the curve is the data itself
+        self.label = "Interpolation: Linear"
+        if (x[1:] == x[:-1]).any():
+            self.label = "Interpolation: Linear Error - X data not monotonically increasing."
+
+    def evaluate(self, x):
+        if self.y.ndim == 1:
+            return np.interp(x, self.x, self.y)
+        return interp_columns(x, self.x, self.y)
+
+
+class CubicSplineFit(Fit):
+    '''Interpolating cubic spline through every point (what "Smoothing Spline" used to be).'''
+    method = 'Cubic Spline'
+
+    def __init__(self, x, y, curve=True):
+        from scipy.interpolate import make_interp_spline
+        x, y = sort_xy(x, y)
+        if (x[1:] == x[:-1]).any():
+            raise ValueError("Cubic spline needs distinct X values; combine duplicates by mean, median, "
+                             "first or last.")
+        if len(x) < 4:
+            raise ValueError("Cubic spline needs at least four distinct X values.")
+        super().__init__(x, y)
+        # One cubic spline (not-a-knot, same as splrep with s=0) for both the plot and resampling
+        self.spline = make_interp_spline(x, y)
+        if curve:
+            self.x_fitted = np.linspace(x.min(), x.max(), 5000)  # Use at least 5000 points for a good approx
+            with profiling.stage('fit curve', points=len(self.x_fitted)):
+                self.y_fitted = self.spline(self.x_fitted)
+        self.label = "Interpolation: Spline"
+
+    def evaluate(self, x):
+        return self.spline(x)
+
+
+class SmoothingSplineFit(Fit):
+    '''
+    Penalised cubic smoothing spline (see smoothing.py). lam is the smoothing
+    factor; None picks it by generalized cross-validation. weights are
+    optional per-point weights, e.g. 1 / variance.
+    '''
+    method = 'Smoothing Spline'
+
+    def __init__(self, x, y, lam=None, weights=None, curve=True):
+        import smoothing
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+        if not is_sorted(x):
+            order = np.argsort(x)
+            x, y = x[order], y[order]
+            if weights is not None:
+                weights = weights[order]
+        super().__init__(x, y)
+        self.spline = smoothing.SmoothingSpline(x, y, weights, lam)
+        if curve:
+            self.x_fitted = np.linspace(x.min(), x.max(), 5000)
+            with profiling.stage('fit curve', points=len(self.x_fitted)):
+                self.y_fitted = self.spline(self.x_fitted)
+        source = "GCV" if lam is None else "given"
+        self.label = (f"Smoothing Spline: Lambda = {format_values(self.spline.lam, '%.3g')} ({source}), "
+                      f"{format_values(self.spline.df, '%.1f')} effective parameters")
+
+    def evaluate(self, x):
+        return self.spline(x)
+
+
+class StepInterpolationFit(Fit):
+    method = 'Step Interpolation'
+
+    def __init__(self, x, y, curve=True):
+        x, y = sort_xy(x, y)
+        super().__init__(x, y)
+        if curve:
+            self.x_fitted = np.linspace(x.min(), x.max(), 2000)
+            with profiling.stage('fit curve', points=len(self.x_fitted)):
+                self.y_fitted = self.evaluate(self.x_fitted)
+        self.label = "Interpolation: Step"
+
+    def evaluate(self, x):
+        indices = sorted_index(self.x, x) - 1
+        indices = np.clip(indices, 0, len(self.y) - 1)
+        return self.y[indices]
+
+
+# Method name (as shown in the GUI dropdown) -> Fit class
+FITTERS = {cls.method: cls for cls in (LinearInterpolationFit, LinearRegressionFit, PolynomialRegressionFit,
+                                       SmoothingSplineFit, CubicSplineFit, StepInterpolationFit)}
+METHODS = list(FITTERS)
+
+# Highest polynomial degree offered in the GUI
+MAX_DEGREE = 20
+
+# Ways to combine points that share an x value (see collapse_duplicates)
+DUPLICATE_REDUCERS = ('mean', 'median', 'first', 'last')
+
+
+def sort_xy(x, y):
+    '''x ascending, with y rows to match. Already sorted input is returned as-is.'''
+    if is_sorted(x):
+        return x, y
+    sorted_indices = np.argsort(x)
+    return x[sorted_indices], np.take(y, sorted_indices, axis=0)
+
+
+def is_sorted(x):
+    return len(x) < 2 or bool((x[1:] >= x[:-1]).all())
+
+
+def collapse_duplicates(x, y, how='mean', weights=None):
+    '''
+    Sort by x and combine the points sharing an x value into one, by how =
+    'mean', 'median', 'first' or 'last' (first/last in input order). The
+    weights of combined points are summed, and 'mean' is then weighted.
+    Returns (x, y, weights) with x strictly increasing.
+
+    Costs one stable sort, skipped when x is already sorted, then finds the
+    runs of equal x in one pass (np.unique without sorting again) and
+    reduces each run with np.add.reduceat.
+    '''
+    if how not in DUPLICATE_REDUCERS:
+        raise ValueError(f"Unknown way to combine duplicates: {how}")
+    if not is_sorted(x):
+        order = np.argsort(x, kind='stable')
+        x = x[order]
+        y = np.take(y, order, axis=0)
+        if weights is not None:
+            weights = weights[order]
+    starts = np.flatnonzero(np.concatenate([[True], x[1:] != x[:-1]]))
+    if len(starts) == len(x):
+        return x, y, weights
+
+    counts = np.diff(np.append(starts, len(x)))
+    shape = (-1,) + (1,) * (y.ndim - 1)  # broadcasts per-group values over the series
+    if how == 'first':
+        reduced = y[starts]
+    elif how == 'last':
+        reduced = y[starts + counts - 1]
+    elif how == 'mean':
+        if weights is None:
+            reduced = np.add.reduceat(y, starts, axis=0) / counts.reshape(shape)
+        else:
+            reduced = (np.add.reduceat(weights.reshape(shape) * y, starts, axis=0)
+                       / np.add.reduceat(weights, starts).reshape(shape))
+    else:
+        # Sort y within each run, then average the middle one or two values
+        groups = np.repeat(np.arange(len(starts)), counts)
+        lower = starts + (counts - 1) // 2
+        upper = starts + counts // 2
+        columns = y.reshape(len(x), -1).T
+        reduced = np.empty((len(starts), len(columns)))
+        for j, column in enumerate(columns):
+            ordered = column[np.lexsort((column, groups))]
+            reduced[:, j] = (ordered[lower] + ordered[upper]) / 2
+        reduced = reduced.reshape((len(starts),) + y.shape[1:])
+
+    if weights is not None:
+        weights = np.add.reduceat(weights, starts)
+    return x[starts], reduced, weights
+
+
+def sorted_index(xp, x):
+    '''
+    np.searchsorted(xp, x, side='right') for sorted xp. When the queries x
+    are sorted too and outnumber the data, it is found the other way round,
+    as a merge: each data point is located among the queries and the counts
+    are summed in one pass, O(n log m + m) instead of O(m log n).
+    '''
+    if len(x) > len(xp) and is_sorted(x):
+        # xp[i] <= x[k] exactly when k >= first[i]
+        first = np.searchsorted(x, xp, side='left')
+        return np.cumsum(np.bincount(first, minlength=len(x) + 1)[:len(x)])
+    return np.searchsorted(xp, x, side='right')
+
+
+def interp_columns(x, xp, fp):
+    '''
+    np.interp for every column of fp at once: the bracketing index and
+    weights are computed once and shared by all series.
+    '''
+    i = np.clip(sorted_index(xp, x) - 1, 0, len(xp) - 2)
+    x0, x1 = xp[i], xp[i + 1]
+    t = ((x - x0) / (x1 - x0))[:, None]
+    # y = f0 + t * (f1 - f0), in place to avoid (points, series) temporaries
+    f0 = np.take(fp, i, axis=0)
+    y = np.take(fp, i + 1, axis=0)
+    y -= f0
+    y *= t
+    y += f0
+    # Clamp outside the data, like np.interp
+    y[x <= xp[0]] = fp[0]
+    y[x >= xp[-1]] = fp[-1]
+    return y
+
+
+def format_values(values, fmt='%.2f', limit=4):
+    '''Scalar or per-series values as text, abbreviated past limit series.'''
+    values = np.atleast_1d(values)
+    text = ", ".join(fmt % v for v in values[:limit])
+    if len(values) > limit:
+        text += f", ... ({len(values)} series)"
+    return text
+
+
+def fit(x, y, method, duplicates=None, **params):
+    '''
+    Fit y(x) with the named method and return a Fit object. duplicates
+    ('mean', 'median', 'first' or 'last') first combines points sharing an x.
+    '''
+    if method not in FITTERS:
+        raise ValueError(f"Unknown method: {method}")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2 or len(y) < 2:
+        raise ValueError("Need at least two data points.")
+    if len(y) != len(x):
+        raise ValueError("x and y need the same number of rows.")
+    with profiling.stage('fit', method=method, points=len(x)):
+        if duplicates is not None:
+            weights = params.get('weights')
+            x, y, weights = collapse_duplicates(x, y, duplicates, weights)
+            if weights is not None:
+                params['weights'] = weights
+        return FITTERS[method](x, y, **params)
+
+
+class FitCache:
+    '''
+    Small LRU cache of Fit objects, keyed on a hash of the input arrays plus
+    the method and its parameters. Switching methods or changing dx on the
+    same data reuses the fitted models instead of refitting.
+    '''
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.fits = OrderedDict()
+        self.lock = threading.Lock()  # fits may be requested from worker threads
+
+    @staticmethod
+    def key(x, y, method, **params):
+        digest = hashlib.blake2b(digest_size=16)
+        scalars = []
+        # Array parameters (e.g. weights) are hashed along with the data
+        arrays = [x, y]
+        for name, value in sorted(params.items()):
+            if isinstance(value, np.ndarray):
+                arrays.append(value)
+                scalars.append((name, 'array'))
+            else:
+                scalars.append((name, value))
+        for a in arrays:
+            a = np.ascontiguousarray(a, dtype=float)
+            digest.update(str(a.shape).encode())
+            digest.update(a)
+        return digest.hexdigest(), method, tuple(scalars)
+
+    def fit(self, x, y, method, **params):
+        '''Return the cached fit for this data and method, fitting it on a miss.'''
+        key = self.key(x, y, method, **params)
+        with self.lock:
+            if key in self.fits:
+                self.fits.move_to_end(key)
+                return self.fits[key]
+
+        model = fit(x, y, method, **params)
+        with self.lock:
+            self.fits[key] = model
+            if len(self.fits) > self.maxsize:
+                self.fits.popitem(last=False)
+        return model
+
+    def clear(self):
+        with self.lock:
+            self.fits.clear()
+
+
+class RegressionSums:
+    '''
+    Running sums n, Sx, Sy, Sxy, Sxx of a least-squares line, so adding or
+    removing a point updates the slope and intercept in O(1). Values are
+    taken relative to the initial means to keep the sums well conditioned.
+    '''
+
+    def __init__(self, x, y):
+        self.x0 = x.mean() if len(x) else 0.0
+        self.y0 = y.mean(axis=0) if len(y) else np.zeros(y.shape[1:])
+        dx = x - self.x0
+        dy = y - self.y0
+        self.n = len(x)
+        self.sx = dx.sum()
+        self.sxx = dx @ dx
+        self.sy = dy.sum(axis=0)
+        self.sxy = dx @ dy
+
+    def add(self, x, y, sign=1):
+        dx = x - self.x0
+        dy = y - self.y0
+        self.n += sign
+        self.sx += sign * dx
+        self.sxx += sign * dx * dx
+        self.sy = self.sy + sign * dy
+        self.sxy = self.sxy + sign * dx * dy
+
+    def remove(self, x, y):
+        self.add(x, y, sign=-1)
+
+    def coefficients(self):
+        '''(slope, intercept), as LinearRegressionFit's lstsq would give.'''
+        denominator = self.n * self.sxx - self.sx**2
+        if self.n < 2 or denominator <= 0:
+            raise ValueError("Need at least two distinct x values.")
+        slope = (self.n * self.sxy - self.sx * self.sy) / denominator
+        intercept = self.y0 + (self.sy - slope * self.sx) / self.n - slope * self.x0
+        return slope, intercept
+
+
+# Methods LiveFit refits in place from its sorted arrays; the splines need a full solve
+INCREMENTAL_METHODS = ('Linear Regression', 'Linear Interpolation', 'Step Interpolation')
+
+
+class LiveFit:
+    '''
+    A fit kept current while single rows of the input table are edited.
+
+    Holds the table rows (NaN marks a blank cell) and the valid rows sorted
+    by x. update() moves an edited row to its new place by shifting only the
+    slice of the sorted arrays between its old and new positions, and keeps
+    the regression sums up to date, so fit() costs O(1) for linear regression
+    and no sort for the interpolation methods. The spline methods still need
+    a full solve over the sorted arrays.
+
+    fit() shares the sorted arrays with the Fit it returns; they change on
+    the next update(), so copy them before handing them to another thread.
+    '''
+
+    def __init__(self, x, y, method, **params):
+        if method not in FITTERS:
+            raise ValueError(f"Unknown method: {method}")
+        self.method = method
+        self.params = params
+        self.rows_x = np.array(x, dtype=float)
+        self.rows_y = np.array(y, dtype=float)
+        valid = self.valid(self.rows_x, self.rows_y)
+        self.x, self.y = sort_xy(self.rows_x[valid], self.rows_y[valid])
+        self.x, self.y = self.x.copy(), self.y.copy()
+        self.sums = RegressionSums(self.x, self.y) if method == 'Linear Regression' else None
+
+    @property
+    def incremental(self):
+        return self.method in INCREMENTAL_METHODS
+
+    @staticmethod
+    def valid(x, y):
+        '''Rows with an x and every y filled in.'''
+        return ~(np.isnan(x) | np.isnan(y.reshape(len(x), -1)).any(axis=1))
+
+    def find(self, x, y):
+        '''Position of a point (x, y) in the sorted arrays.'''
+        start = np.searchsorted(self.x, x, side='left')
+        stop = np.searchsorted(self.x, x, side='right')
+        for i in range(start, stop):
+            if np.array_equal(self.y[i], y):
+                return i
+        raise KeyError(x)
+
+    def update(self, row, x, y):
+        '''Row row of the table now holds (x, y); either may be NaN (blank).'''
+        y = np.asarray(y, dtype=float)
+        old_x, old_y = self.rows_x[row], self.rows_y[row].copy()
+        was_valid = self.valid(np.atleast_1d(old_x), old_y[None])[0]
+        is_valid = self.valid(np.atleast_1d(x), y[None])[0]
+        self.rows_x[row] = x
+        self.rows_y[row] = y
+
+        if self.sums is not None:
+            if was_valid:
+                self.sums.remove(old_x, old_y)
+            if is_valid:
+                self.sums.add(x, y)
+
+        if was_valid and is_valid:
+            self._move(self.find(old_x, old_y), x, y)
+        elif was_valid:
+            i = self.find(old_x, old_y)
+            self.x = np.delete(self.x, i)
+            self.y = np.delete(self.y, i, axis=0)
+        elif is_valid:
+            i = np.searchsorted(self.x, x, side='right')
+            self.x = np.insert(self.x, i, x)
+            self.y = np.insert(self.y, i, y, axis=0)
+
+    def _move(self, i, x, y):
+        '''Move the point at position i to (x, y), shifting the points in between by one.'''
+        j = np.searchsorted(self.x, x, side='right')
+        if j > i:
+            j -= 1  # the point itself leaves position i
+            self.x[i:j] = self.x[i + 1:j + 1]
+            self.y[i:j] = self.y[i + 1:j + 1]
+        elif j < i:
+            self.x[j + 1:i + 1] = self.x[j:i]
+            self.y[j + 1:i + 1] = self.y[j:i]
+        self.x[j] = x
+        self.y[j] = y
+
+    def fit(self):
+        '''A Fit of the current valid rows.'''
+        if len(self.x) < 2:
+            raise ValueError("Need at least two data points.")
+        if self.sums is None or self.params.get('duplicates') is not None:
+            # Already sorted, so this skips the argsort
+            return fit(self.x, self.y, self.method, **self.params)
+        with profiling.stage('fit', method=self.method, points=len(self.x), live=True):
+            # x is sorted, so its ends are the domain: no O(n) pass per edit
+            return LinearRegressionFit(self.x, self.y, self.sums.coefficients(), (self.x[0], self.x[-1]))
+
+
+def sample_grid(x, dx):
+    '''Uniform grid from min(x) to max(x) with spacing dx, including max(x) when it falls on the grid.'''
+    start, stop = np.min(x), np.max(x)
+    total = grid_size(start, stop, dx)
+    return np.minimum(start + dx * np.arange(total), stop)
+
+
+def grid_size(start, stop, dx):
+    '''Number of points start, start + dx, ... up to and including stop.'''
+    if not dx > 0:
+        raise ValueError("dx must be positive.")
+    if stop < start:
+        return 0
+    # The tolerance keeps stop itself when it is a whole number of steps away,
+    # which (stop - start) / dx can miss by a rounding error
+    steps = (stop - start) / dx
+    return int(np.floor(steps + 1e-9 * max(steps, 1))) + 1
+
+
+def iter_grid(start, stop, dx, chunk_size=None):
+    '''The points of sample_grid() from start to stop, yielded chunk by chunk.'''
+    chunk_size = chunk_size or CHUNK_SIZE
+    total = grid_size(start, stop, dx)
+    for i in range(0, total, chunk_size):
+        yield np.minimum(start + dx * np.arange(i, min(i + chunk_size, total)), stop)
+
+
+def log_grid(start, stop, points):
+    '''points log-spaced values from start to stop, both included. Both must be positive.'''
+    if not (start > 0 and stop > 0):
+        raise ValueError("A log-spaced grid needs positive X values.")
+    if points < 2:
+        raise ValueError("A log-spaced grid needs at least two points.")
+    grid = np.geomspace(start, stop, int(points))
+    grid[[0, -1]] = start, stop  # exact ends, not exp(log(end))
+    return grid
+
+
+def parse_grid(text):
+    '''Grid values from a list separated by commas, semicolons, spaces or newlines.'''
+    tokens = [t for t in re.split(r'[\s,;]+', text) if t]
+    try:
+        values = np.array(tokens, dtype=float)
+    except ValueError:
+        raise ValueError("Grid values must be numbers separated by commas, spaces or new lines.") from None
+    return target_grid(values)
+
+
+def target_grid(values):
+    '''
+    A user-supplied grid (an explicit list, a column read from a file) ready
+    for resampling: blanks dropped and sorted, so evaluation can merge it with
+    the sorted data. Already sorted grids are not sorted again.
+    '''
+    grid = np.asarray(values, dtype=float).ravel()
+    grid = grid[~np.isnan(grid)]
+    if len(grid) == 0:
+        raise ValueError("The target grid has no values.")
+    if not is_sorted(grid):
+        grid = np.sort(grid)
+    return grid
+
+
+def iter_chunks(grid, chunk_size=None):
+    '''Consecutive chunks of an explicit grid.'''
+    chunk_size = chunk_size or CHUNK_SIZE
+    for start in range(0, len(grid), chunk_size):
+        yield grid[start:start + chunk_size]
+
+
+def stream_resample(model, dx, sinks, chunk_size=None, progress=None):
+    '''
+    Evaluate model over the uniform grid chunk by chunk and hand each
+    (x, y) chunk to every sink's write() (an exporter writer, a Preview, ...).
+    Returns the number of grid points. progress(done, total) may raise to abort.
+    '''
+    start, stop = np.min(model.x), np.max(model.x)
+    return stream_chunks(model, iter_grid(start, stop, dx, chunk_size), grid_size(start, stop, dx),
+                         sinks, progress)
+
+
+def stream_grid(model, grid, sinks, chunk_size=None, progress=None):
+    '''stream_resample() over an explicit grid instead of a uniform one.'''
+    return stream_chunks(model, iter_chunks(grid, chunk_size), len(grid), sinks, progress)
+
+
+def stream_chunks(model, chunks, total, sinks, progress=None):
+    '''Evaluate model on each grid chunk and write (x, y) to every sink.'''
+    done = 0
+    for x_chunk in chunks:
+        y_chunk = model.evaluate(x_chunk)
+        for sink in sinks:
+            sink.write(x_chunk, y_chunk)
+        done += len(x_chunk)
+        if progress is not None:
+            progress(done, total)
+    return total
+
+
+class Preview:
+    '''
+    Sink that keeps every k-th point of a stream so that at most max_points
+    are held, e.g. for showing a very fine resample in the output table.
+    '''
+
+    def __init__(self, total, max_points=100_000):
+        self.step = max(-(-total // max_points), 1)
+        self.seen = 0
+        self.x_chunks = []
+        self.y_chunks = []
+
+    def write(self, x, y):
+        # Global indices that are multiples of step, local to this chunk
+        first = -self.seen % self.step
+        self.x_chunks.append(np.asarray(x[first::self.step]))
+        self.y_chunks.append(np.asarray(y[first::self.step]))
+        self.seen += len(x)
+
+    @property
+    def x(self):
+        return np.concatenate(self.x_chunks) if self.x_chunks else np.array([])
+
+    @property
+    def y(self):
+        return np.concatenate(self.y_chunks) if self.y_chunks else np.array([])
+
+
+def resample(x, y, method, dx, **params):
+    '''Fit and resample in one call. Returns (fit, sampled_x, sampled_y).'''
+    model = fit(x, y, method, **params)
+    sampled_x, sampled_y = model.resample(dx)
+    return model, sampled_x, sampled_y
+
+
+def default_dx(x):
+    '''Default sampling interval: roughly the mean spacing, rounded to two significant digits.'''
+    return float(f'{(np.max(x) - np.min(x)) / len(x):.2g}')
+
+
+def parse_delimited(text, max_cols=2, delimiter='\t'):
+    '''
+    Parse delimited text (e.g. cells copied from Excel) into a float array of
+    shape (rows, cols) in one vectorized pass. Blank or invalid entries are NaN.
+    max_cols=None keeps every column.
+    '''
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if text.endswith('\n'):
+        text = text[:-1]  # Excel ends copied ranges with a newline
+    lines = text.split('\n')
+    counts = np.fromiter((line.count(delimiter) for line in lines), dtype=int, count=len(lines))
+    width = int(counts.max()) + 1
+
+    if (counts == width - 1).all():
+        # Rectangular block: split every cell in one go and reshape
+        cells = np.array(text.replace('\n', delimiter).split(delimiter)).reshape(len(lines), width)
+    else:
+        # Ragged rows: pad the short ones with blanks
+        cells = np.full((len(lines), width), '', dtype=object)
+        for r, line in enumerate(lines):
+            row = line.split(delimiter)
+            cells[r, :len(row)] = row
+        cells = cells.astype(str)
+
+    cells = cells[:, :max_cols]
+    return np.column_stack([to_float(cells[:, c]) for c in range(cells.shape[1])])
+
+
+def to_float(strings):
+    '''Convert an array of strings to floats, with NaN for blank or invalid entries.'''
+    strings = np.char.strip(np.asarray(strings, dtype=str))
+    strings = np.where(strings == '', 'nan', strings)
+    try:
+        return strings.astype(np.float64)
+    except ValueError:
+        # Slow path only when the column holds non-numeric text
+        return np.array([parse_float(s) for s in strings], dtype=np.float64)
+
+
+def parse_float(text):
+    '''float(text), or NaN if the text is not a number.'''
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
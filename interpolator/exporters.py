@@ -0,0 +1,188 @@
+'''
+Exporters for the DataFit & Interpolation Tool output.
+
+Writers take the output columns in chunks and stream them to disk, so the
+peak memory of an export is one chunk no matter how long the output is.
+Values are written at full precision unless a CSV precision is given.
+
+Formats: CSV, NPY, NPZ, and Feather/Parquet when pyarrow is installed.
+
+'''
+
+import os
+import zipfile
+
+import numpy as np
+
+
+# Rows formatted/written per step
+CHUNK_ROWS = 100_000
+
+
+class Writer:
+    '''
+    Base class for streaming writers. rows is the total number of rows that
+    will be written; binary formats need it up front for their headers.
+    '''
+
+    def __init__(self, path, columns, rows, precision=None):
+        self.path = path
+        self.columns = list(columns)
+        self.rows = rows
+        self.precision = precision
+        self.written = 0
+
+    def write(self, *chunks):
+        '''Append one chunk per column (equal-length 1-D arrays).'''
+        block = np.column_stack([np.asarray(c, dtype=float) for c in chunks])
+        self.write_block(block)
+        self.written += len(block)
+
+    def write_block(self, block):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None and self.rows is not None and self.written != self.rows:
+            raise ValueError(f"Expected {self.rows} rows, wrote {self.written}.")
+
+
+class CSVWriter(Writer):
+    def __init__(self, path, columns, rows=None, precision=None):
+        super().__init__(path, columns, rows, precision)
+        self.file = open(path, 'w', newline='')
+        self.file.write(",".join(self.columns) + "\n")
+        # %r is the shortest repr that round-trips the float exactly
+        cell = "%r" if precision is None else f"%.{precision}f"
+        self.row_format = ",".join([cell] * len(self.columns)) + "\n"
+
+    def write_block(self, block):
+        # One string-format call per chunk instead of one per cell
+        self.file.write((self.row_format * len(block)) % tuple(block.ravel().tolist()))
+
+    def close(self):
+        self.file.close()
+
+
+class NPYWriter(Writer):
+    '''A single (rows, columns) float64 array, written header first then chunk by chunk.'''
+
+    def __init__(self, path, columns, rows, precision=None):
+        super().__init__(path, columns, rows, precision)
+        self.file = open(path, 'wb')
+        write_npy_header(self.file, (rows, len(self.columns)))
+
+    def write_block(self, block):
+        self.file.write(np.ascontiguousarray(block, dtype='<f8').tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class NPZWriter(Writer):
+    '''
+    NPZ archive with a 'data' (rows, columns) array streamed into the zip,
+    plus the column names under 'columns'.
+    '''
+
+    def __init__(self, path, columns, rows, precision=None):
+        super().__init__(path, columns, rows, precision)
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True)
+        self.file = self.zip.open('data.npy', 'w', force_zip64=True)
+        write_npy_header(self.file, (rows, len(self.columns)))
+
+    def write_block(self, block):
+        self.file.write(np.ascontiguousarray(block, dtype='<f8').tobytes())
+
+    def close(self):
+        self.file.close()
+        with self.zip.open('columns.npy', 'w') as f:
+            np.lib.format.write_array(f, np.array(self.columns))
+        self.zip.close()
+
+
+class ArrowWriter(Writer):
+    '''Feather (Arrow IPC) or Parquet, one record batch / row group per chunk.'''
+
+    def __init__(self, path, columns, rows=None, precision=None):
+        super().__init__(path, columns, rows, precision)
+        pa = require_pyarrow()
+        self.schema = pa.schema([(name, pa.float64()) for name in self.columns])
+        if path.lower().endswith('.parquet'):
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def write_block(self, block):
+        import pyarrow as pa
+        batch = pa.record_batch([block[:, i] for i in range(block.shape[1])], schema=self.schema)
+        if hasattr(self.writer, 'write_batch'):
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write_table(pa.Table.from_batches([batch]))
+
+    def close(self):
+        self.writer.close()
+
+
+# File extension -> writer class
+WRITERS = {
+    '.csv': CSVWriter,
+    '.npy': NPYWriter,
+    '.npz': NPZWriter,
+    '.feather': ArrowWriter,
+    '.parquet': ArrowWriter,
+}
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Feather/Parquet export requires pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def available_formats():
+    '''Extensions that can be written in this environment.'''
+    formats = ['.csv', '.npy', '.npz']
+    try:
+        require_pyarrow()
+    except ImportError:
+        return formats
+    return formats + ['.feather', '.parquet']
+
+
+def write_npy_header(file, shape):
+    np.lib.format.write_array_header_1_0(file, {'descr': '<f8', 'fortran_order': False, 'shape': shape})
+
+
+def open_writer(path, columns, rows=None, precision=None):
+    '''Open a streaming writer for path, chosen by its extension.'''
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError(f"Unsupported export format: {ext or path}")
+    if rows is None and ext in ('.npy', '.npz'):
+        raise ValueError(f"{ext} export needs the row count up front.")
+    return WRITERS[ext](path, columns, rows=rows, precision=precision)
+
+
+def export_arrays(path, arrays, columns, precision=None, chunk_rows=CHUNK_ROWS, progress=None):
+    '''
+    Write equal-length column arrays to path in chunks, calling
+    progress(done, total) after each one.
+    '''
+    rows = len(arrays[0])
+    with open_writer(path, columns, rows, precision) as writer:
+        for start in range(0, rows, chunk_rows):
+            stop = min(start + chunk_rows, rows)
+            writer.write(*(a[start:stop] for a in arrays))
+            if progress is not None:
+                progress(stop, rows)
@@ -1,6 +1,6 @@
-// Copyright (c) 2024 Kevin Kuei
-// This source code is licensed under the MIT license found in the
-// LICENSE file in the root directory of this source tree.
+# Copyright (c) 2024 Kevin Kuei
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
 
 '''
 First PyQt Program: Simple Data Fit & Interpolator Program
@@ -8,113 +8,129 @@ First PyQt Program: Simple Data Fit & Interpolator Program
 
 '''
 
+import argparse
+import multiprocessing
+import os
 import sys
+import time
+
+# Taken before Qt and NumPy are imported, for --startup-time
+START_TIME = time.perf_counter()
+
 from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
-                               QWidget, QTableWidget, QTableWidgetItem, QPushButton,
-                               QLabel, QLineEdit, QSplitter, QComboBox, QFileDialog)
-from PySide6.QtGui import QAction, QKeySequence
-from PySide6.QtCore import Qt
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+                               QWidget, QPushButton, QLabel, QLineEdit, QSplitter,
+                               QComboBox, QFileDialog, QProgressBar, QSpinBox, QFormLayout,
+                               QDialog, QDialogButtonBox, QListWidget, QAbstractItemView, QCheckBox)
+from PySide6.QtCore import Qt, QTimer, Signal
 import numpy as np
-import pandas as pd
-from scipy.interpolate import make_interp_spline
-from scipy.interpolate import splrep, BSpline
-
-
-class TableWidget(QTableWidget):
-    def __init__(self, *args):
-        super().__init__(*args)
-        self.setContextMenuPolicy(Qt.ActionsContextMenu)
-
-        # Copy action
-        copy_action = QAction("Copy", self)
-        copy_action.triggered.connect(self.copy)
-        self.addAction(copy_action)
-
-        # Paste action
-        paste_action = QAction("Paste", self)
-        paste_action.triggered.connect(self.paste)
-        self.addAction(paste_action)
-
-        # Delete action
-        delete_action = QAction("Delete", self)
-        delete_action.triggered.connect(self.delete_selected)
-        self.addAction(delete_action)
-
-
-    def copy(self):
-        selected = self.selectedRanges()
-        # if selected:
-        #     data = ''
-        #     for range in selected:
-        #         for row in range(range.topRow(), range.bottomRow() + 1):
-        #             for col in range(range.leftColumn(), range.rightColumn() + 1):
-        #                 if self.item(row, col):
-        #                     data += self.item(row, col).text() + '\t'
-        #                 else:
-        #                     data += '\t'
-        #             data = data.strip() + '\n'
-        #     QApplication.clipboard().setText(data.strip())
-        selected_ranges = self.selectedRanges()
-        if not selected_ranges:
-            return
-        
-        copied_data = ""
-        for selection in selected_ranges:
-            top_row, bottom_row = selection.topRow(), selection.bottomRow()
-            left_col, right_col = selection.leftColumn(), selection.rightColumn()
-
-            for row in range(top_row, bottom_row + 1):
-                row_data = []
-                for col in range(left_col, min(right_col + 1, 2)):  # limit to 2 columns
-                    item = self.item(row, col)
-                    row_data.append(item.text() if item else "")
-                copied_data += "\t".join(row_data) + "\n"
-        
-        QApplication.clipboard().setText(copied_data.strip())
-
-    def paste(self):
-        clipboard = QApplication.clipboard()
-        data = clipboard.text()
-        if data:
-            rows = data.split('\n')
-            current_row = self.currentRow()
-            current_col = self.currentColumn()
-            
-            # Check if we need to add rows
-            required_rows = current_row + len(rows)
-            if required_rows > self.rowCount():
-                self.setRowCount(required_rows)
-            
-            for r, row_data in enumerate(rows):
-                # cols = row_data.split('\t')
-                
-                # # Check if we need to add columns
-                # required_cols = current_col + len(cols)
-                # if required_cols > self.columnCount():
-                #     self.setColumnCount(required_cols)
-
-                cols = row_data.split('\t')[:2]  # Limit to 2 columns
-                
-                for c, col_data in enumerate(cols):
-                    self.setItem(current_row + r, current_col + c, QTableWidgetItem(col_data))
-
-    def delete_selected(self):
-        for item in self.selectedItems():
-            self.setItem(item.row(), item.column(), QTableWidgetItem(""))
-
-    def keyPressEvent(self, event):
-        if event.matches(QKeySequence.Copy):
-            self.copy()
-        elif event.matches(QKeySequence.Paste):
-            self.paste()
-        elif event.key() in [Qt.Key_Backspace, Qt.Key_Delete]:
-            self.delete_selected()
+
+import bootstrap
+import engine
+import exporters
+import loaders
+import profiling
+import workers
+from models import ArrayTableModel, TableView, series_headers
+from plotting import LODPlot, BlitManager
+
+IMPORTED_TIME = time.perf_counter()
+
+
+# Stages shown in the status bar timing readout, in pipeline order
+HUD_STAGES = ['paste', 'import', 'read input', 'fit', 'fit curve', 'resample', 'bootstrap', 'table', 'plot', 'draw',
+              'export']
+
+# Resamples larger than this many points are streamed to a file instead of
+# being held in memory; the output table and plot then show a preview.
+STREAM_POINTS = 5_000_000
+
+# Grids the fit can be resampled onto
+GRID_MODES = {
+    'uniform': "Grid: uniform dx",
+    'log': "Grid: log-spaced",
+    'list': "Grid: list of X values",
+    'file': "Grid: X values from file",
+}
+
+# Bootstrap confidence band drawn around the resampled curve
+BAND_LEVEL = 0.95
+BAND_REPLICATES = 1000
+
+# Live fit waits this long after the last cell edit before refitting
+LIVE_DELAY_MS = 150
+# More edited rows than this between refits rebuild the live fit from scratch
+LIVE_MAX_ROWS = 100
+
+IMPORT_FILTER = "Data files ({});;All files (*)".format(
+    " ".join("*" + ext for ext in ('.csv',) + loaders.EXCEL_EXTENSIONS + loaders.BINARY_EXTENSIONS))
+
+EXPORT_FILTERS = {
+    '.csv': "CSV files (*.csv)",
+    '.npy': "NumPy array (*.npy)",
+    '.npz': "NumPy archive (*.npz)",
+    '.feather': "Feather (*.feather)",
+    '.parquet': "Parquet (*.parquet)",
+}
+
+
+class ImportDialog(QDialog):
+    '''Column selection (and record layout, for raw binary files) for an import.'''
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Import {os.path.basename(path)}")
+        self.binary = os.path.splitext(path)[1].lower() in loaders.BINARY_EXTENSIONS
+
+        layout = QFormLayout(self)
+        self.x_combo = QComboBox()
+        # One or more Y columns, all fitted against the same X
+        self.y_list = QListWidget()
+        self.y_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
+        if self.binary:
+            self.dtype_combo = QComboBox()
+            self.dtype_combo.addItems(["<f8", "<f4", ">f8", ">f4"])
+            layout.addRow("Value type:", self.dtype_combo)
+            self.columns_input = QSpinBox()
+            self.columns_input.setRange(1, 1024)
+            self.columns_input.valueChanged.connect(self.set_binary_columns)
+            layout.addRow("Values per record:", self.columns_input)
+            self.columns_input.setValue(2)
         else:
-            super().keyPressEvent(event)
+            names = loaders.column_names(path)
+            self.x_combo.addItems(names)
+            self.y_list.addItems(names)
+            self.y_list.setCurrentRow(min(1, len(names) - 1))
+
+        layout.addRow("X column:", self.x_combo)
+        layout.addRow("Y columns:", self.y_list)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def set_binary_columns(self, columns):
+        names = [str(i) for i in range(columns)]
+        self.x_combo.clear()
+        self.x_combo.addItems(names)
+        self.y_list.clear()
+        self.y_list.addItems(names)
+        self.y_list.setCurrentRow(min(1, columns - 1))
+
+    def options(self):
+        '''Keyword arguments for workers.import_job.'''
+        y_cols = sorted(self.y_list.row(item) for item in self.y_list.selectedItems())
+        options = {'x_col': self.x_combo.currentIndex(), 'y_cols': y_cols or [None]}
+        if self.binary:
+            options['dtype'] = self.dtype_combo.currentText()
+            options['columns'] = self.columns_input.value()
+        return options
+
 
 class MainWindow(QMainWindow):
+    plot_ready = Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -122,6 +138,13 @@ class MainWindow(QMainWindow):
 
         self.x_data = []
         self.y_data = []
+        self.fit = None
+        self.fit_cache = engine.FitCache()
+        self.sampled_x = np.array([])
+        self.sampled_y = np.array([])
+        self.band = None        # (lower, upper) on sampled_x for the shown series
+        self.band_input = None  # (x, y, method, params) the output was resampled from
+        self.band_fill = None
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -146,8 +169,10 @@ class MainWindow(QMainWindow):
         self.input_label.setStyleSheet("font-weight: bold")
         self.input_column.addWidget(self.input_label)
 
-        self.input_table = TableWidget(10, 2)
-        self.input_table.setHorizontalHeaderLabels(["X", "Y"])
+        # Pasting a wider block adds Y columns; every Y column is fitted against X
+        self.input_model = ArrayTableModel(series_headers(1), rows=10, editable=True, fmt="%.12g",
+                                           expandable=True)
+        self.input_table = TableView(self.input_model)
         self.input_column.addWidget(self.input_table)
 
         self.clear_button = QPushButton("Clear")
@@ -160,28 +185,100 @@ class MainWindow(QMainWindow):
         self.add_button.setStyleSheet("background-color: lightgrey; color: black;")
         self.input_column.addWidget(self.add_button)
 
+        self.import_button = QPushButton("Import Data...")
+        self.import_button.clicked.connect(self.import_data)
+        self.import_button.setStyleSheet("background-color: lightgrey; color: black;")
+        self.input_column.addWidget(self.import_button)
+
         self.swap_button = QPushButton("Swap X and Y")
         self.swap_button.clicked.connect(self.swap_x_y)
         self.swap_button.setStyleSheet("background-color: lightblue; color: black;")
         self.input_column.addWidget(self.swap_button)
 
         self.dropdown = QComboBox()
-        self.dropdown.addItems(["Linear Interpolation", "Linear Regression", "Smoothing Spline", "Step Interpolation"])
-        self.dropdown.setCurrentIndex(1)
+        self.dropdown.addItems(engine.METHODS)
+        self.dropdown.setCurrentText("Linear Regression")
+        self.dropdown.currentTextChanged.connect(self.update_method_options)
         self.input_column.addWidget(self.dropdown)
 
+        # Smoothing factor for the smoothing spline; blank picks it by cross-validation
+        self.lam_input = QLineEdit()
+        self.lam_input.setPlaceholderText("Smoothing factor (blank = auto, GCV)")
+        self.input_column.addWidget(self.lam_input)
+
+        # Polynomial degree, and the RMSE of every lower degree from the same fit
+        self.degree_input = QSpinBox()
+        self.degree_input.setRange(0, engine.MAX_DEGREE)
+        self.degree_input.setValue(3)
+        self.degree_input.setPrefix("Degree: ")
+        self.input_column.addWidget(self.degree_input)
+        self.degree_table_button = QPushButton("RMSE by Degree...")
+        self.degree_table_button.clicked.connect(self.show_degree_table)
+        self.degree_table_button.setStyleSheet("background-color: lightgrey; color: black;")
+        self.input_column.addWidget(self.degree_table_button)
+        self.update_method_options(self.dropdown.currentText())
+
+        # How points sharing an X value are combined before fitting
+        self.duplicates_dropdown = QComboBox()
+        self.duplicates_dropdown.addItem("Duplicate X: keep all", None)
+        for how in engine.DUPLICATE_REDUCERS:
+            self.duplicates_dropdown.addItem(f"Duplicate X: {how}", how)
+        self.input_column.addWidget(self.duplicates_dropdown)
+
         self.plot_button = QPushButton("Plot and Fit Regression")
         self.plot_button.clicked.connect(self.plot_and_fit)
         self.plot_button.setStyleSheet("background-color: lightpink; color: black;")
         self.input_column.addWidget(self.plot_button)
 
+        # Live mode refits as cells are edited, once typing pauses
+        self.live_checkbox = QCheckBox("Live fit while editing")
+        self.live_checkbox.toggled.connect(self.toggle_live)
+        self.input_column.addWidget(self.live_checkbox)
+        self.live = None        # engine.LiveFit while live mode is on
+        self.live_rows = set()  # rows edited since the last live refit; None means rebuild
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_DELAY_MS)
+        self.live_timer.timeout.connect(self.live_refit)
+        self.input_model.dataChanged.connect(self.on_input_changed)
+        self.input_model.modelReset.connect(self.on_input_reset)
+        self.input_model.rowsInserted.connect(self.on_input_reset)
+        self.input_model.rowsRemoved.connect(self.on_input_reset)
+        self.input_model.columnsInserted.connect(self.on_input_reset)
+        self.dropdown.currentTextChanged.connect(self.on_input_reset)
+        self.lam_input.editingFinished.connect(self.on_input_reset)
+        self.degree_input.valueChanged.connect(self.on_input_reset)
+        self.duplicates_dropdown.currentIndexChanged.connect(self.on_input_reset)
+
         self.coefficients_label = QLabel("Coefficients: ")
         self.input_column.addWidget(self.coefficients_label)
 
+        # Which Y series is drawn when several are fitted
+        self.series_dropdown = QComboBox()
+        self.series_dropdown.currentIndexChanged.connect(self.show_series)
+        self.series_dropdown.hide()
+        self.input_column.addWidget(self.series_dropdown)
+
+        # Where the fit is sampled: a uniform dx grid, or a target grid of given X values
+        self.grid_dropdown = QComboBox()
+        for mode, text in GRID_MODES.items():
+            self.grid_dropdown.addItem(text, mode)
+        self.grid_dropdown.currentIndexChanged.connect(self.update_grid_options)
+        self.input_column.addWidget(self.grid_dropdown)
+
         self.dx_input = QLineEdit()
         self.dx_input.setPlaceholderText("Enter dx value")
         self.input_column.addWidget(self.dx_input)
 
+        self.grid_input = QLineEdit()
+        self.input_column.addWidget(self.grid_input)
+        self.grid_path = None
+        self.grid_file_button = QPushButton("Choose Grid File...")
+        self.grid_file_button.clicked.connect(self.choose_grid_file)
+        self.grid_file_button.setStyleSheet("background-color: lightgrey; color: black;")
+        self.input_column.addWidget(self.grid_file_button)
+        self.update_grid_options()
+
         self.generate_button = QPushButton("Generate Sampled Data")
         self.generate_button.clicked.connect(self.generate_sampled_data)
         self.generate_button.setStyleSheet("background-color: lightgreen; color: black;")
@@ -193,30 +290,114 @@ class MainWindow(QMainWindow):
         self.output_label.setStyleSheet("font-weight: bold")
         self.output_column.addWidget(self.output_label)
 
-        self.output_table = TableWidget(0, 2)
-        self.output_table.setHorizontalHeaderLabels(["X", "Y (Fitted)"])
-        self.output_table.itemSelectionChanged.connect(self.highlight_selected_data)
+        self.output_model = ArrayTableModel(series_headers(1, " (Fitted)"))
+        self.output_table = TableView(self.output_model)
+        self.output_table.selectionModel().selectionChanged.connect(self.highlight_selected_data)
         self.output_column.addWidget(self.output_table)
 
+        self.band_checkbox = QCheckBox(f"{BAND_LEVEL:.0%} bootstrap band ({BAND_REPLICATES} refits)")
+        self.band_checkbox.toggled.connect(self.toggle_band)
+        self.output_column.addWidget(self.band_checkbox)
+
         copy_output_button = QPushButton("Copy Output Table")
         copy_output_button.clicked.connect(self.copy_output_table)
         copy_output_button.setStyleSheet("background-color: lightgrey; color: black;")
         self.output_column.addWidget(copy_output_button)
 
-        save_output_button = QPushButton("Save Output to CSV")
-        save_output_button.clicked.connect(self.save_output_to_csv)
+        # Decimal places for CSV export; the minimum means full precision
+        self.precision_input = QSpinBox()
+        self.precision_input.setRange(-1, 17)
+        self.precision_input.setSpecialValueText("Full")
+        self.precision_input.setValue(-1)
+        precision_layout = QFormLayout()
+        precision_layout.addRow("CSV decimals:", self.precision_input)
+        self.output_column.addLayout(precision_layout)
+
+        save_output_button = QPushButton("Save Output...")
+        save_output_button.clicked.connect(self.save_output)
         save_output_button.setStyleSheet("background-color: lightgrey; color: black;")
         self.output_column.addWidget(save_output_button)
 
-        # Plot column widgets
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-        self.plot_column.addWidget(self.canvas)
+        # Plot column: matplotlib is the slowest import, so the canvas is built by
+        # setup_plot() once the window is on screen; a placeholder holds its place
+        self.canvas = None
+        self.plot_placeholder = QLabel("Loading plot...")
+        self.plot_placeholder.setAlignment(Qt.AlignCenter)
+        self.plot_placeholder.setMinimumWidth(400)
+        self.plot_column.addWidget(self.plot_placeholder)
+
+        # Latest duration of each pipeline stage
+        self.timing_label = QLabel()
+        self.statusBar().addWidget(self.timing_label)
+
+        # Performance menu: session trace and optional cProfile capture
+        performance_menu = self.menuBar().addMenu("Performance")
+        self.profile_action = performance_menu.addAction("Profile with cProfile")
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.toggle_profile)
+        performance_menu.addAction("Save Profile...").triggered.connect(self.save_profile)
+        performance_menu.addSeparator()
+        performance_menu.addAction("Save Trace...").triggered.connect(self.save_trace)
+        performance_menu.addAction("Clear Trace").triggered.connect(self.clear_trace)
+
+        # Status bar with progress and cancel for background jobs
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_jobs)
+        self.cancel_button.hide()
+        self.statusBar().addPermanentWidget(self.cancel_button)
+
+        # Fits and resampling run on a worker pool; results arrive as signals
+        self.jobs = workers.JobRunner(self)
+        self.jobs.started.connect(self.on_job_started)
+        self.jobs.progress.connect(self.on_job_progress)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.failed.connect(self.on_job_failed)
+        self.jobs.idle.connect(self.on_jobs_idle)
 
         # Set initial window size and center it on the screen
         self.resize(1100, 600)
         self.center()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.canvas is None:
+            QTimer.singleShot(0, self.setup_plot)
+
+    def setup_plot(self):
+        '''Build the matplotlib canvas and plot artists, if not done yet.'''
+        if self.canvas is not None:
+            return
+        with profiling.stage('startup plot'):
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+            from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+
+            self.figure = Figure()
+            self.ax = self.figure.add_subplot()
+            self.canvas = FigureCanvas(self.figure)
+            self.plot_column.removeWidget(self.plot_placeholder)
+            self.plot_placeholder.deleteLater()
+            self.plot_column.addWidget(NavigationToolbar(self.canvas, self))
+            self.plot_column.addWidget(self.canvas)
+            # Persistent artists: series are decimated to the canvas width, re-decimated
+            # on zoom/pan, and updated in place rather than replotted
+            self.lod = LODPlot(self.ax)
+            self.data_line = self.lod.add('o', mfc='w', label='Original data')
+            self.fitted_line = self.lod.add('r', label='Fitted/Interpolated')
+            self.output_line = self.lod.add('o', c='k', mfc='w', label='Output data')
+            self.highlight_line = self.lod.add('o', c='b', mfc='y')
+            for line in self.lod.lines:
+                line.line.set_visible(False)
+
+            # The selection highlight is blitted over a cached background
+            self.blit = BlitManager(self.canvas, [self.highlight_line.line])
+        self.plot_ready.emit()
+
     def center(self):
         frame_geometry = self.frameGeometry()
         screen_center = QApplication.primaryScreen().availableGeometry().center()
@@ -224,224 +405,566 @@ class MainWindow(QMainWindow):
         self.move(frame_geometry.topLeft())
 
     def add_row(self):
-        row_position = self.input_table.rowCount()
-        self.input_table.insertRow(row_position)
+        self.input_model.set_row_count(self.input_model.rowCount() + 1)
 
     def clear_table(self):
-        self.input_table.clearContents()
-        self.input_table.setRowCount(10)
-        self.input_table.setColumnCount(2)
+        self.input_model.clear(rows=10, headers=series_headers(1))
 
     def swap_x_y(self):
-        for row in range(self.input_table.rowCount()):
-            x_item = self.input_table.item(row, 0)
-            y_item = self.input_table.item(row, 1)
-            if x_item and y_item:
-                x_text = x_item.text()
-                y_text = y_item.text()
-                self.input_table.setItem(row, 0, QTableWidgetItem(y_text))
-                self.input_table.setItem(row, 1, QTableWidgetItem(x_text))
+        self.input_model.swap_columns(0, 1)
+        # Live mode refits from dataChanged; otherwise refit a fit already shown
+        if self.fit is not None and not self.live_checkbox.isChecked():
+            self.plot_and_fit()
+
+    def import_data(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Data", "", IMPORT_FILTER)
+        if not path:
+            return
+        dialog = ImportDialog(path, self)
+        if dialog.exec() == QDialog.Accepted:
+            self.load_file(path, **dialog.options())
 
-    def plot_and_fit(self):
-        self.x_data = []
-        self.y_data = []
+    def load_file(self, path, **options):
+        '''Load a file into the input table on the worker pool, bypassing table cells.'''
+        self.statusBar().showMessage(f"Loading {path}...")
+        self.jobs.submit('import', workers.import_job, path, options)
 
-        rows_to_delete = []
-        for row in range(self.input_table.rowCount()):
-            try:
-                x_item = self.input_table.item(row, 0)
-                y_item = self.input_table.item(row, 1)
-                if x_item is None or y_item is None or x_item.text().strip() == "" or y_item.text().strip() == "":
-                    rows_to_delete.append(row)
-                    continue
-                x = float(x_item.text())
-                y = float(y_item.text())
-                self.x_data.append(x)
-                self.y_data.append(y)
-            except ValueError:
-                rows_to_delete.append(row)
-                continue
-
-        if len(self.x_data) < 2 or len(self.y_data) < 2:
-            self.coefficients_label.setText("Coefficients: Error - Need at least two data points.")
+    def plot_and_fit(self):
+        data = self.read_input()
+        if data is None:
             return
+        params = self.fit_params()
+        if params is None:
+            return
+        self.jobs.submit('fit', workers.fit_job, self.fit_cache, *data, self.dropdown.currentText(), params)
 
-        # Delete rows with blank or invalid data
-        for row in reversed(rows_to_delete):
-            self.input_table.removeRow(row)
-
-        self.x_data = np.array(self.x_data)
-        self.y_data = np.array(self.y_data)
+    def toggle_live(self, enabled):
+        self.live_timer.stop()
+        self.live = None
+        self.live_rows = None
+        if enabled:
+            self.live_refit()
 
+    def on_input_changed(self, top_left, bottom_right, roles=()):
+        if not self.live_checkbox.isChecked():
+            return
+        if self.live_rows is not None:
+            rows = range(top_left.row(), bottom_right.row() + 1)
+            if len(self.live_rows) + len(rows) > LIVE_MAX_ROWS:
+                self.live_rows = None
+            else:
+                self.live_rows.update(rows)
+        self.live_timer.start()  # restarting it debounces a burst of edits
+
+    def on_input_reset(self, *args):
+        if not self.live_checkbox.isChecked():
+            return
+        self.live_rows = None
+        self.live_timer.start()
+
+    def live_refit(self):
+        '''
+        Bring the live fit up to date with the input table. Only the edited rows
+        are applied, unless the table was reshaped or the method changed. Blank
+        rows are skipped rather than deleted, since they may be half typed.
+        '''
+        params = self.fit_params()
+        if params is None:
+            return
         method = self.dropdown.currentText()
-
-        # Perform linear regression
-        if method == 'Linear Regression':
-            A = np.vstack([self.x_data, np.ones(len(self.x_data))]).T
-            self.slope, self.intercept = np.linalg.lstsq(A, self.y_data, rcond=None)[0]
-            self.coefficients_label.setText(f"Coefficients: Slope = {self.slope:.2f}, Intercept = {self.intercept:.2f}")
-            self.y_fitted = self.slope * self.x_data + self.intercept
-            self.x_fitted = self.x_data
-        elif method == 'Linear Interpolation':
-            # sorted_indices = np.argsort(self.x_data)
-            # self.x_data = self.x_data[sorted_indices]
-            # self.y_data = self.y_data[sorted_indices]
-            # spline = make_interp_spline(self.x_data, self.y_data)
-            # self.y_fitted = spline(self.x_data)
-            # self.coefficients_label.setText("Interpolation: Linear")
-            sorted_indices = np.argsort(self.x_data)
-            self.x_data = self.x_data[sorted_indices]
-            self.y_data = self.y_data[sorted_indices]
-            self.y_fitted = np.interp(self.x_data, self.x_data, self.y_data)
-            self.coefficients_label.setText("Interpolation: Linear")
-            self.x_fitted = self.x_data
-            if len(np.unique(self.x_data)) != len(self.x_data):
-                self.coefficients_label.setText("Interpolation: Linear Error - X data not monotonically increasing.")
-        elif method == 'Smoothing Spline':
-            sorted_indices = np.argsort(self.x_data)
-            self.x_data = self.x_data[sorted_indices]
-            self.y_data = self.y_data[sorted_indices]
-            tck = splrep(self.x_data, self.y_data, s=0)  # s=0 for smoothing spline
-            self.x_fitted = np.linspace(self.x_data.min(), self.x_data.max(), 5000) # Use at least 5000 points for a good approx
-            self.y_fitted = BSpline(*tck)(self.x_fitted)
-            self.coefficients_label.setText("Interpolation: Spline")
-        elif method == 'Step Interpolation':
-            sorted_indices = np.argsort(self.x_data)
-            self.x_data = self.x_data[sorted_indices]
-            self.y_data = self.y_data[sorted_indices]
-            self.x_fitted = np.linspace(self.x_data.min(), self.x_data.max(), 2000)
-            indices = np.searchsorted(self.x_data, self.x_fitted, side='right') - 1
-            indices = np.clip(indices, 0, len(self.y_data) - 1)
-            self.y_fitted = self.y_data[indices]
-            self.coefficients_label.setText("Interpolation: Step")
-
-        # Plot data and regression line
+        columns = self.input_model.columns
+        if self.live is None or self.live_rows is None:
+            y = columns[1] if len(columns) == 2 else np.column_stack(columns[1:])
+            self.live = engine.LiveFit(columns[0], y, method, **params)
+        else:
+            for row in sorted(self.live_rows):
+                y = columns[1][row] if len(columns) == 2 else [c[row] for c in columns[1:]]
+                self.live.update(row, columns[0][row], y)
+        self.live_rows = set()
+
+        if not self.live.incremental:
+            # A spline needs a full solve: run it on a worker, over a snapshot of the sorted data
+            self.jobs.submit('fit', workers.fit_job, self.fit_cache, self.live.x.copy(), self.live.y.copy(),
+                             method, params)
+            return
+        try:
+            fit = self.live.fit()
+        except ValueError as e:
+            self.coefficients_label.setText(f"Coefficients: Error - {e}")
+            return
+        self.set_fit(fit)
         self.plot_data()
 
+    def update_method_options(self, method):
+        self.lam_input.setVisible(method == 'Smoothing Spline')
+        self.degree_input.setVisible(method == 'Polynomial Regression')
+        self.degree_table_button.setVisible(method == 'Polynomial Regression')
+
+    def update_grid_options(self):
+        mode = self.grid_dropdown.currentData()
+        self.dx_input.setVisible(mode == 'uniform')
+        self.grid_input.setVisible(mode != 'uniform')
+        self.grid_file_button.setVisible(mode == 'file')
+        self.grid_input.setPlaceholderText({
+            'log': "Number of points",
+            'list': "X values, e.g. 0.5, 1, 2, 5",
+            'file': "Column name or index (default: first)",
+        }.get(mode, ""))
+
+    def choose_grid_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Choose Grid File", "", IMPORT_FILTER)
+        if path:
+            self.grid_path = path
+            self.grid_file_button.setText(f"Grid: {os.path.basename(path)}")
+
+    def target_grid(self, x):
+        '''
+        The selected target grid for data x, or None if it is invalid. A grid file
+        is read by the resample job, so it comes back as (path, column) instead.
+        '''
+        mode = self.grid_dropdown.currentData()
+        text = self.grid_input.text().strip()
+        try:
+            if mode == 'log':
+                try:
+                    points = int(text)
+                except ValueError:
+                    raise ValueError("Number of points must be a whole number.") from None
+                return engine.log_grid(np.min(x), np.max(x), points)
+            if mode == 'list':
+                return engine.parse_grid(text)
+            if self.grid_path is None:
+                raise ValueError("Choose a grid file first.")
+        except ValueError as e:
+            self.coefficients_label.setText(f"Coefficients: Error - {e}")
+            return None
+        return self.grid_path, text or None
+
+    def fit_params(self):
+        '''Extra keyword arguments for the selected method, or None if they are invalid.'''
+        params = {}
+        if self.duplicates_dropdown.currentData() is not None:
+            params['duplicates'] = self.duplicates_dropdown.currentData()
+        if self.dropdown.currentText() == 'Polynomial Regression':
+            params['degree'] = self.degree_input.value()
+        if self.dropdown.currentText() != 'Smoothing Spline' or self.lam_input.text().strip() == "":
+            return params
+        try:
+            params['lam'] = float(self.lam_input.text())
+        except ValueError:
+            self.coefficients_label.setText("Coefficients: Error - Smoothing factor must be a number.")
+            return None
+        return params
+
+    def read_input(self):
+        '''
+        Read (x, y) from the input table, or None if there are fewer than two
+        valid points. y is 2-D, one column per series, when there are several
+        Y columns.
+        '''
+        with profiling.stage('read input', rows=self.input_model.rowCount()):
+            return self._read_input()
+
+    def _read_input(self):
+        columns = self.input_model.columns
+
+        # Blank and invalid cells are stored as NaN
+        valid = ~np.logical_or.reduce([np.isnan(c) for c in columns])
+        if np.count_nonzero(valid) < 2:
+            self.coefficients_label.setText("Coefficients: Error - Need at least two data points.")
+            return None
+
+        # Delete rows with blank or invalid data
+        if not valid.all():
+            self.input_model.keep_rows(valid)
+        columns = self.input_model.columns
+        x = columns[0].copy()
+        y = columns[1].copy() if len(columns) == 2 else np.column_stack(columns[1:])
+
         # Pre-populate sampling dx if empty
         if self.dx_input.text() == "":
-            dx = np.round((self.x_data.max() - self.x_data.min())/len(self.x_data)/0.1)*0.1
+            dx = engine.default_dx(x)
             self.dx_input.setText(str(dx))
-
-    def plot_data(self):
-        self.ax.clear()
-        self.ax.plot(self.x_data, self.y_data, 'o', mfc='w', label='Original data')
+        return x, y
+
+    def set_fit(self, fit):
+        self.fit = fit
+        self.x_data = fit.x
+        self.y_data = fit.y
+        self.x_fitted = fit.x_fitted
+        self.y_fitted = fit.y_fitted
+        self.coefficients_label.setText(fit.label)
+        self.set_series_names(series_headers(fit.series)[1:])
+
+    def show_degree_table(self):
+        '''RMSE of every degree up to the fitted one, all from the fit's single QR.'''
+        if not isinstance(self.fit, engine.PolynomialRegressionFit):
+            self.coefficients_label.setText("Coefficients: Fit a polynomial first.")
+            return
+        columns = self.fit.degree_table()
+        dialog = QDialog(self)
+        dialog.setWindowTitle("RMSE by Degree")
+        layout = QVBoxLayout(dialog)
+        model = ArrayTableModel(["Degree"] + series_headers(len(columns) - 1, " RMSE")[1:], fmt="%.6g")
+        model.set_columns(columns)
+        layout.addWidget(TableView(model))
+        dialog.resize(300, 400)
+        dialog.show()
+
+    def set_series_names(self, names):
+        if [self.series_dropdown.itemText(i) for i in range(self.series_dropdown.count())] == names:
+            return
+        self.series_dropdown.blockSignals(True)
+        self.series_dropdown.clear()
+        self.series_dropdown.addItems(names)
+        self.series_dropdown.blockSignals(False)
+        self.series_dropdown.setVisible(len(names) > 1)
+
+    def series(self, y):
+        '''The column of y for the series picked in the dropdown.'''
+        if y.ndim == 1:
+            return y
+        return y[:, max(self.series_dropdown.currentIndex(), 0)]
+
+    def show_series(self):
+        if self.fit is None:
+            return
+        if self.band is not None:
+            # The band belongs to the series shown before
+            self.band = None
+            self.fill_output_table()
+            self.request_band()
+        if self.output_line.line.get_visible():
+            self.plot_output()
+        else:
+            self.plot_data()
+
+    def plot_data(self, draw=True):
+        self.setup_plot()
+        with profiling.stage('plot', points=len(self.x_data)):
+            self.data_line.set_series(self.x_data, self.series(self.y_data))
+            self.fitted_line.set_series(self.x_fitted, self.series(self.y_fitted))
+        self.data_line.line.set_visible(True)
+        self.fitted_line.line.set_visible(True)
         if self.dropdown.currentText() == 'Step Interpolation':
-            self.ax.step(self.x_fitted, self.y_fitted, where='post', c='r', label='Step Interpolated')
+            self.fitted_line.line.set_drawstyle('steps-post')
+            self.fitted_line.line.set_label('Step Interpolated')
+        elif self.dropdown.currentText() == 'Cubic Spline':
+            self.fitted_line.line.set_drawstyle('default')
+            self.fitted_line.line.set_label('Spline Interpolated')
         elif self.dropdown.currentText() == 'Smoothing Spline':
-            self.ax.plot(self.x_fitted, self.y_fitted, 'r', label='Spline Interpolated')
+            self.fitted_line.line.set_drawstyle('default')
+            self.fitted_line.line.set_label('Smoothing Spline')
         else:
-            self.ax.plot(self.x_fitted, self.y_fitted, 'r', label='Fitted/Interpolated')
-        self.ax.legend()
-        self.canvas.draw()
+            self.fitted_line.line.set_drawstyle('default')
+            self.fitted_line.line.set_label('Fitted/Interpolated')
+
+        self.output_line.line.set_visible(False)
+        self.highlight_line.line.set_visible(False)
+        if self.band_fill is not None:
+            self.band_fill.remove()
+            self.band_fill = None
+        if draw:
+            self.redraw()
+
+    def redraw(self):
+        with profiling.stage('draw'):
+            self.lod.autoscale()
+            self.ax.legend()
+            self.canvas.draw()
+        self.update_timings()
+
+    def update_timings(self):
+        self.timing_label.setText(profiling.format_stages(profiling.tracer.latest(HUD_STAGES)))
 
     def highlight_selected_data(self):
-        selected_rows = sorted(set(idx.row() for idx in self.output_table.selectedIndexes()))
-
-        # Redraw the original data plot
-        self.ax.clear()
-        self.ax.plot(self.x_data, self.y_data, 'o', mfc='w', label='Original data')
-        if self.dropdown.currentText() == 'Step Interpolation':
-            self.ax.step(self.x_fitted, self.y_fitted, where='post', c='r', label='Step Interpolated')
-        elif self.dropdown.currentText() == 'Smoothing Spline':
-            self.ax.plot(self.x_fitted, self.y_fitted, 'r', label='Spline Interpolated')
+        if len(self.sampled_x) == 0:
+            return
+        self.setup_plot()
+        selected_rows = self.output_table.selected_rows()
+
+        # Highlight selected data points, looked up in the full-precision arrays
+        self.highlight_line.set_series(self.sampled_x[selected_rows],
+                                       self.series(self.sampled_y)[selected_rows])
+        self.highlight_line.line.set_visible(True)
+
+        if not self.output_line.line.get_visible():
+            # Output points were hidden by a refit; bring them back with a full draw
+            self.output_line.line.set_visible(True)
+            self.redraw()
         else:
-            self.ax.plot(self.x_fitted, self.y_fitted, 'r', label='Fitted/Interpolated')
-
-        self.plot_data()
-        self.ax.plot(self.sampled_x, self.sampled_y, 'o', c='k', mfc='w', label='Output data')
+            self.blit.update()
 
-        # Highlight selected data points
-        selected_x = [float(self.output_table.item(row, 0).text()) for row in selected_rows]
-        selected_y = [float(self.output_table.item(row, 1).text()) for row in selected_rows]
-        self.ax.plot(selected_x, selected_y, 'o', c='b', mfc='y')
+    def generate_sampled_data(self):
+        # Refit in case the data was swapped or method changed between resampling.
+        # Unchanged data and method hit the fit cache, so only the evaluation runs.
+        data = self.read_input()
+        if data is None:
+            return
 
-        self.ax.legend()
-        self.canvas.draw()
+        params = self.fit_params()
+        if params is None:
+            return
+        if self.grid_dropdown.currentData() != 'uniform':
+            grid = self.target_grid(data[0])
+            if grid is None:
+                return
+            grid_file = grid if isinstance(grid, tuple) else None
+            self.band_input = (*data, self.dropdown.currentText(), params)
+            self.jobs.submit('resample', workers.grid_resample_job, self.fit_cache, *data,
+                             self.dropdown.currentText(), params, None if grid_file else grid, grid_file)
+            return
 
-    def generate_sampled_data(self):
-        # Updat the fit in case the data was swapped or method changed between resampling
-        self.plot_and_fit()
-        
         dx = self.dx_input.text()
         try:
             dx = float(dx)
         except ValueError:
             return
 
-        if len(self.x_data) == 0 or len(self.y_data) == 0:
+        try:
+            points = engine.grid_size(np.min(data[0]), np.max(data[0]), dx)
+        except ValueError as e:
+            self.coefficients_label.setText(f"Coefficients: Error - {e}")
+            return
+
+        if points > STREAM_POINTS:
+            # Too big to hold: stream every chunk to a file and keep only a preview
+            path = self.ask_output_path(f"Save {points} Resampled Points")
+            if not path:
+                return
+            headers = series_headers(1 if data[1].ndim == 1 else data[1].shape[1], " (Fitted)")
+            self.band_input = None  # no band over a streamed preview
+            self.jobs.submit('stream', workers.stream_resample_job, self.fit_cache, *data,
+                             self.dropdown.currentText(), params, dx, path, headers,
+                             self.output_precision())
             return
 
-        min_x = min(self.x_data)
-        max_x = max(self.x_data)
-        sampled_x = np.arange(min_x, max_x, dx)
+        self.band_input = (*data, self.dropdown.currentText(), params)
+        self.jobs.submit('resample', workers.resample_job, self.fit_cache, *data,
+                         self.dropdown.currentText(), params, dx)
 
-        method = self.dropdown.currentText()
-        if method == 'Linear Regression':
-            sampled_y = self.slope * sampled_x + self.intercept
-        elif method == 'Linear Interpolation':
-            # Sort the data by x before interpolation
-            sorted_indices = np.argsort(self.x_data)
-            x_sorted = self.x_data[sorted_indices]
-            y_sorted = self.y_data[sorted_indices]
-            sampled_y = np.interp(sampled_x, x_sorted, y_sorted)
-        elif method == 'Smoothing Spline':
-            sorted_indices = np.argsort(self.x_data)
-            x_sorted = self.x_data[sorted_indices]
-            y_sorted = self.y_data[sorted_indices]
-            spline = make_interp_spline(x_sorted, y_sorted)
-            sampled_y = spline(sampled_x)
-        elif method == 'Step Interpolation':
-            sorted_indices = np.argsort(self.x_data)
-            x_sorted = self.x_data[sorted_indices]
-            y_sorted = self.y_data[sorted_indices]
-            indices = np.searchsorted(x_sorted, sampled_x, side='right') - 1
-            indices = np.clip(indices, 0, len(y_sorted) - 1)
-            sampled_y = y_sorted[indices]
-
-        self.output_table.setRowCount(len(sampled_x))
-        for i in range(len(sampled_x)):
-            self.output_table.setItem(i, 0, QTableWidgetItem(f"{sampled_x[i]:.2f}"))
-            self.output_table.setItem(i, 1, QTableWidgetItem(f"{sampled_y[i]:.2f}"))
-        
+    def set_output(self, sampled_x, sampled_y, title="Output Data"):
         self.sampled_x = sampled_x
         self.sampled_y = sampled_y
-        
-        self.plot_data()
-        self.ax.plot(sampled_x, sampled_y, 'o', c='k', mfc='w', label='Output data')
-        self.ax.legend()
-        self.canvas.draw()
+        self.band = None
+        with profiling.stage('table', rows=len(sampled_x)):
+            self.fill_output_table()
+        self.output_label.setText(title)
+        self.plot_output()
+
+    def fill_output_table(self):
+        '''X, one fitted column per series, then the confidence band if there is one.'''
+        y = self.sampled_y
+        columns = [self.sampled_x] + ([y] if y.ndim == 1 else list(y.T))
+        headers = series_headers(len(columns) - 1, " (Fitted)")
+        if self.band is not None:
+            columns += list(self.band)
+            name = self.series_dropdown.currentText() if len(columns) > 2 else "Y"
+            headers += [f"{name} Lower {BAND_LEVEL:.0%}", f"{name} Upper {BAND_LEVEL:.0%}"]
+        self.output_model.set_columns(columns, headers)
+
+    def toggle_band(self, enabled):
+        if enabled:
+            self.request_band()
+        else:
+            self.jobs.cancel('band')
+            if self.band is not None:
+                self.band = None
+                self.fill_output_table()
+                self.plot_output()
+
+    def request_band(self):
+        '''Bootstrap the shown series' band on the current output grid, in the background.'''
+        if not self.band_checkbox.isChecked() or self.band_input is None or len(self.sampled_x) == 0:
+            return
+        x, y, method, params = self.band_input
+        self.jobs.submit('band', workers.band_job, x, self.series(y), method, params, self.sampled_x,
+                         BAND_REPLICATES, BAND_LEVEL)
+
+    def plot_output(self):
+        with profiling.stage('plot', points=len(self.x_data) + len(self.sampled_x)):
+            self.plot_data(draw=False)
+            self.output_line.set_series(self.sampled_x, self.series(self.sampled_y))
+            if self.band is not None:
+                # The band is smooth: a few thousand vertices draw it as well as millions
+                keep = np.linspace(0, len(self.sampled_x) - 1,
+                                   min(len(self.sampled_x), bootstrap.BAND_POINTS)).round().astype(int)
+                lower, upper = self.band
+                self.band_fill = self.ax.fill_between(self.sampled_x[keep], lower[keep], upper[keep],
+                                                      color='r', alpha=0.2, linewidth=0,
+                                                      label=f"{BAND_LEVEL:.0%} confidence band")
+        self.output_line.line.set_visible(True)
+        self.redraw()
+
+    def on_job_started(self, kind):
+        self.progress_bar.setRange(0, 0)  # busy until the job reports progress
+        self.progress_bar.show()
+        self.cancel_button.show()
+
+    def on_job_progress(self, kind, percent):
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(percent)
+
+    def on_job_finished(self, kind, result):
+        if kind == 'fit':
+            self.set_fit(result)
+            self.plot_data()
+        elif kind == 'resample':
+            fit, sampled_x, sampled_y = result
+            self.set_fit(fit)
+            self.set_output(sampled_x, sampled_y)
+            self.request_band()
+        elif kind == 'band':
+            self.band = result
+            self.fill_output_table()
+            self.plot_output()
+        elif kind == 'stream':
+            fit, preview, path, total = result
+            self.set_fit(fit)
+            self.set_output(preview.x, preview.y,
+                            f"Output Data (preview: {len(preview.x)} of {total} points)")
+            self.statusBar().showMessage(f"Saved {total} rows to {path}", 5000)
+        elif kind == 'export':
+            self.statusBar().showMessage(f"Saved {result}", 5000)
+            self.update_timings()
+        elif kind == 'import':
+            path, x, ys = result
+            self.input_model.set_columns([x] + ys, series_headers(len(ys)))
+            self.statusBar().showMessage(f"Loaded {len(x)} rows from {path}", 5000)
+            self.plot_and_fit()
+
+    def on_job_failed(self, kind, message):
+        if kind in ('export', 'stream'):
+            self.statusBar().showMessage(f"Export failed - {message}")
+        elif kind == 'import':
+            self.statusBar().showMessage(f"Import failed - {message}")
+        elif kind == 'band':
+            self.statusBar().showMessage(f"Confidence band failed - {message}")
+        else:
+            self.coefficients_label.setText(f"Coefficients: Error - {message}")
+
+    def on_jobs_idle(self):
+        self.progress_bar.hide()
+        self.cancel_button.hide()
 
+    def cancel_jobs(self):
+        self.jobs.cancel()
 
     def copy_output_table(self):
-        data = ""
-        for row in range(self.output_table.rowCount()):
-            row_data = []
-            for col in range(self.output_table.columnCount()):
-                item = self.output_table.item(row, col)
-                if item:
-                    row_data.append(item.text())
-                else:
-                    row_data.append("")
-            data += "\t".join(row_data) + "\n"
-        QApplication.clipboard().setText(data)
-
-    def save_output_to_csv(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV files (*.csv)")
-        if path:
-            data = []
-            for row in range(self.output_table.rowCount()):
-                row_data = []
-                for col in range(self.output_table.columnCount()):
-                    item = self.output_table.item(row, col)
-                    row_data.append(item.text() if item else "")
-                data.append(row_data)
-            df = pd.DataFrame(data, columns=["X", "Y (Fitted)"])
-            df.to_csv(path, index=False)
+        QApplication.clipboard().setText(self.output_model.to_text() + "\n")
+
+    def ask_output_path(self, title="Save Output"):
+        available = ";;".join(EXPORT_FILTERS[ext] for ext in exporters.available_formats())
+        path, selected = QFileDialog.getSaveFileName(self, title, "", available)
+        if path and not os.path.splitext(path)[1]:
+            # Take the extension from the chosen filter, CSV if none was reported
+            path += next((ext for ext, name in EXPORT_FILTERS.items() if name == selected), '.csv')
+        return path
+
+    def output_precision(self):
+        precision = self.precision_input.value()
+        return None if precision < 0 else precision
+
+    def toggle_profile(self, enabled):
+        if enabled:
+            profiling.profile.start()
+            self.statusBar().showMessage("Profiling with cProfile...", 3000)
+        else:
+            profiling.profile.stop()
+            self.statusBar().showMessage("Profiling stopped; use Save Profile to keep it", 5000)
+
+    def save_profile(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Profile", "", "pstats (*.prof);;Text report (*.txt)")
+        if not path:
+            return
+        # A running capture is stopped first so the saved stats are complete
+        self.profile_action.setChecked(False)
+        try:
+            profiling.profile.dump(path)
+        except ValueError as e:
+            self.statusBar().showMessage(str(e), 5000)
+            return
+        self.statusBar().showMessage(f"Saved {path}", 5000)
+
+    def save_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "", "Chrome trace (*.json)")
+        if not path:
+            return
+        profiling.tracer.dump(path)
+        self.statusBar().showMessage(f"Saved {path}", 5000)
+
+    def clear_trace(self):
+        profiling.tracer.clear()
+        self.update_timings()
+
+    def save_output(self):
+        path = self.ask_output_path()
+        if not path:
+            return
+        # Written straight from the full-precision arrays, in chunks, off the UI thread
+        self.jobs.submit('export', workers.export_job, path, list(self.output_model.columns),
+                         self.output_model.headers, self.output_precision())
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="DataFit & Interpolation Tool")
+    parser.add_argument('--import', dest='import_path', default=None,
+                        help="CSV/XLSX/binary file to load at startup")
+    parser.add_argument('--x-col', default=None, help="X column name or index (default: first column)")
+    parser.add_argument('--y-col', nargs='+', default=None,
+                        help="Y column names or indices, one series each (default: second column)")
+    parser.add_argument('--dtype', default='<f8', help="Value type of raw binary files (default: <f8)")
+    parser.add_argument('--columns', type=int, default=2, help="Values per record in raw binary files")
+    parser.add_argument('--duplicates', choices=engine.DUPLICATE_REDUCERS, default=None,
+                        help="Combine points sharing an X value (default: keep them all)")
+    parser.add_argument('--trace', default=None, help="Write a Chrome trace of the session to this file on exit")
+    parser.add_argument('--profile', default=None,
+                        help="Profile the whole session with cProfile and write it here on exit (.prof or text)")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="Print how long startup took, then exit")
+    parser.add_argument('--startup-budget', type=float, default=None,
+                        help="With --startup-time, exit with an error if the window took longer "
+                             "than this many seconds to appear")
+    # Leave Qt's own arguments (e.g. -platform) to QApplication
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def report_startup(app, budget=None):
+    '''Print the startup stages and quit; the exit status is 1 if over budget.'''
+    shown = profiling.tracer.latest(['startup window'])['startup window'] + IMPORTED_TIME - START_TIME
+    ready = time.perf_counter() - START_TIME
+    print(profiling.format_stages(profiling.tracer.latest(['startup imports', 'startup window', 'startup plot'])))
+    print(f"Window shown after {shown:.3f} s, ready after {ready:.3f} s")
+    if budget is not None and shown > budget:
+        print(f"Startup over budget: {shown:.3f} s > {budget:.3f} s", file=sys.stderr)
+        app.exit(1)
+    else:
+        app.exit(0)
 
 
 if __name__ == '__main__':
+    # The bootstrap process pool re-runs a frozen (PyInstaller) executable in its workers
+    multiprocessing.freeze_support()
+    args = parse_args(sys.argv[1:])
+    profiling.tracer.record('startup imports', START_TIME, IMPORTED_TIME)
     app = QApplication(sys.argv)
     main_window = MainWindow()
+    if args.profile:
+        main_window.profile_action.setChecked(True)
+    if args.duplicates:
+        main_window.duplicates_dropdown.setCurrentIndex(main_window.duplicates_dropdown.findData(args.duplicates))
     main_window.show()
-    sys.exit(app.exec())
+    profiling.tracer.record('startup window', IMPORTED_TIME, time.perf_counter())
+    if args.startup_time:
+        main_window.plot_ready.connect(lambda: report_startup(app, args.startup_budget))
+    if args.import_path:
+        main_window.load_file(args.import_path, x_col=args.x_col, y_cols=args.y_col,
+                              dtype=args.dtype, columns=args.columns)
+    status = app.exec()
+    if args.trace:
+        profiling.tracer.dump(args.trace)
+    if args.profile:
+        profiling.profile.stop()
+        profiling.profile.dump(args.profile)
+    sys.exit(status)
@@ -0,0 +1,137 @@
+'''
+File loaders for the DataFit & Interpolation Tool.
+
+Reads x/y columns from CSV, XLSX and raw binary float files straight into
+NumPy arrays. Large CSVs are parsed in chunks and binary files are memory
+mapped, so only the selected columns are ever held in memory.
+
+Columns can be given by name or by 0-based position.
+
+'''
+
+import os
+
+import numpy as np
+
+
+# Rows parsed per CSV chunk / copied per binary chunk
+CHUNK_ROWS = 1_000_000
+
+BINARY_EXTENSIONS = ('.bin', '.dat', '.raw', '.f32', '.f64')
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+
+def load(path, x_col=None, y_col=None, progress=None, dtype='<f8', columns=2):
+    '''
+    Load (x, y) from path, picking the reader by extension. x_col/y_col
+    default to the first two columns. dtype and columns describe the record
+    layout of raw binary files.
+    '''
+    return tuple(load_columns(path, [x_col, y_col], progress, dtype, columns))
+
+
+def load_columns(path, cols, progress=None, dtype='<f8', columns=2):
+    '''
+    Load several columns in a single pass, one float array per entry of cols.
+    A None entry means the column at that position in cols (0, 1, ...).
+    '''
+    ext = os.path.splitext(path)[1].lower()
+    if ext in EXCEL_EXTENSIONS:
+        return load_excel(path, cols, progress)
+    if ext in BINARY_EXTENSIONS:
+        return load_binary(path, dtype, columns, cols, progress)
+    return load_csv(path, cols, progress)
+
+
+def load_grid(path, col=None, progress=None, dtype='<f8', columns=1):
+    '''
+    A single column of target X values, e.g. another dataset's sampling
+    positions. col defaults to the first column; a raw binary file defaults
+    to one value per record.
+    '''
+    return load_columns(path, [col], progress, dtype, columns)[0]
+
+
+def column_names(path):
+    '''Header of a CSV/XLSX file, for column selection.'''
+    import pandas as pd
+    if os.path.splitext(path)[1].lower() in EXCEL_EXTENSIONS:
+        return [str(c) for c in pd.read_excel(path, nrows=0).columns]
+    return [str(c) for c in pd.read_csv(path, nrows=0).columns]
+
+
+def _resolve(names, col, default):
+    '''Column name or position -> position.'''
+    if col is None:
+        return default
+    if isinstance(col, str) and col in names:
+        return names.index(col)
+    try:
+        position = int(col)
+    except ValueError:
+        raise ValueError(f"No column named {col!r}.")
+    if not 0 <= position < len(names):
+        raise ValueError(f"No column {col!r}.")
+    return position
+
+
+def _resolve_all(names, cols):
+    return [_resolve(names, col, i) for i, col in enumerate(cols)]
+
+
+def load_csv(path, cols, progress=None, chunk_rows=CHUNK_ROWS):
+    '''Parse only the selected columns, a chunk of rows at a time.'''
+    import pandas as pd
+    names = column_names(path)
+    cols = _resolve_all(names, cols)
+
+    total = os.path.getsize(path)
+    chunks = [[] for _ in cols]
+    with open(path, 'rb') as f:
+        reader = pd.read_csv(f, usecols=sorted(set(cols)), chunksize=chunk_rows)
+        for chunk in reader:
+            # usecols keeps file order, so select by name from the original header
+            for out, col in zip(chunks, cols):
+                out.append(pd.to_numeric(chunk[names[col]], errors='coerce').to_numpy(dtype=float))
+            if progress is not None:
+                progress(f.tell(), total)
+    return [np.concatenate(out) if out else np.array([]) for out in chunks]
+
+
+def load_excel(path, cols, progress=None):
+    import pandas as pd
+    names = column_names(path)
+    cols = _resolve_all(names, cols)
+    df = pd.read_excel(path, usecols=sorted(set(cols)))
+    arrays = [pd.to_numeric(df[names[col]], errors='coerce').to_numpy(dtype=float) for col in cols]
+    if progress is not None:
+        progress(1, 1)
+    return arrays
+
+
+def load_binary(path, dtype='<f8', columns=2, cols=(None, None), progress=None,
+                chunk_rows=CHUNK_ROWS):
+    '''
+    Raw row-major records of `columns` values of `dtype`, with no header.
+    The file is memory mapped and the selected columns are copied out in
+    chunks, so the rest of the file never has to fit in memory.
+    '''
+    dtype = np.dtype(dtype)
+    names = [str(i) for i in range(columns)]
+    cols = _resolve_all(names, cols)
+
+    record = dtype.itemsize * columns
+    rows = os.path.getsize(path) // record
+    if rows == 0:
+        return [np.array([]) for _ in cols]
+    data = np.memmap(path, dtype=dtype, mode='r', shape=(rows, columns))
+
+    arrays = [np.empty(rows) for _ in cols]
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        for out, col in zip(arrays, cols):
+            out[start:stop] = data[start:stop, col]
+        if progress is not None:
+            progress(stop, rows)
+    del data
+    return arrays
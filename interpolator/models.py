@@ -0,0 +1,233 @@
+'''
+Model/view classes for the DataFit & Interpolation Tool tables.
+
+ArrayTableModel reads straight from NumPy column arrays instead of holding a
+QTableWidgetItem per cell. Qt only asks the model for the cells that are
+visible, so a table with a million rows costs little more than its arrays.
+
+'''
+
+import numpy as np
+from PySide6.QtWidgets import QApplication, QTableView, QHeaderView
+from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+import engine
+import profiling
+
+
+def series_headers(count, suffix=""):
+    '''Headers for an X column followed by count Y columns.'''
+    if count == 1:
+        return ["X", "Y" + suffix]
+    return ["X"] + [f"Y{i + 1}{suffix}" for i in range(count)]
+
+
+class ArrayTableModel(QAbstractTableModel):
+    '''
+    Table model over a list of float64 column arrays. Blank cells are NaN.
+    Values are only formatted to text when a view requests them. An
+    expandable model grows extra Y columns when a wider block is pasted.
+    '''
+
+    def __init__(self, headers, rows=0, editable=False, fmt="%.2f", expandable=False, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.editable = editable
+        self.expandable = expandable
+        self.item_flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if editable:
+            self.item_flags |= Qt.ItemIsEditable
+        self.fmt = fmt
+        self.columns = [np.full(rows, np.nan) for _ in self.headers]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns[0]) if self.columns else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        value = self.columns[index.column()][index.row()]
+        if np.isnan(value):
+            return ""
+        return self.fmt % value
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        value = engine.parse_float(value)
+        self.columns[index.column()][index.row()] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section + 1)
+
+    def flags(self, index):
+        # Qt queries this for every selected cell, so it returns a precomputed value
+        return self.item_flags
+
+    def column(self, col):
+        return self.columns[col]
+
+    def set_columns(self, columns, headers=None):
+        '''Replace the table contents. Float64 arrays are used as-is, without a copy.'''
+        self.beginResetModel()
+        self.columns = [np.asarray(c, dtype=float) for c in columns]
+        if headers is not None:
+            self.headers = list(headers)
+        self.endResetModel()
+
+    def set_column_count(self, count):
+        '''Add blank Y columns up to count columns in total.'''
+        current = self.columnCount()
+        if count <= current:
+            return
+        self.beginInsertColumns(QModelIndex(), current, count - 1)
+        self.columns += [np.full(self.rowCount(), np.nan) for _ in range(count - current)]
+        self.headers = series_headers(count - 1)
+        self.endInsertColumns()
+
+    def set_row_count(self, rows):
+        '''Grow (padding with blanks) or shrink the table to the given number of rows.'''
+        current = self.rowCount()
+        if rows > current:
+            self.beginInsertRows(QModelIndex(), current, rows - 1)
+            self.columns = [np.concatenate([c, np.full(rows - current, np.nan)]) for c in self.columns]
+            self.endInsertRows()
+        elif rows < current:
+            self.beginRemoveRows(QModelIndex(), rows, current - 1)
+            self.columns = [c[:rows] for c in self.columns]
+            self.endRemoveRows()
+
+    def set_block(self, row, col, values):
+        '''Write a 2-D block of values with its top-left cell at (row, col).'''
+        values = np.atleast_2d(values)
+        n_rows, n_cols = values.shape
+        if self.expandable:
+            self.set_column_count(col + n_cols)
+        n_cols = min(n_cols, self.columnCount() - col)
+        if n_rows == 0 or n_cols <= 0:
+            return
+        if row + n_rows > self.rowCount():
+            self.set_row_count(row + n_rows)
+        for c in range(n_cols):
+            self.columns[col + c][row:row + n_rows] = values[:, c]
+        self.dataChanged.emit(self.index(row, col), self.index(row + n_rows - 1, col + n_cols - 1))
+
+    def keep_rows(self, mask):
+        '''Drop every row where mask is False in a single compaction step.'''
+        self.beginResetModel()
+        self.columns = [c[mask] for c in self.columns]
+        self.endResetModel()
+
+    def swap_columns(self, a, b):
+        self.columns[a], self.columns[b] = self.columns[b], self.columns[a]
+        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def clear(self, rows=0, headers=None):
+        headers = self.headers if headers is None else headers
+        self.set_columns([np.full(rows, np.nan) for _ in headers], headers)
+
+    def to_text(self, rows=None, cols=None):
+        '''Tab-separated text for the given rows and columns (default: everything).'''
+        rows = slice(None) if rows is None else rows
+        cols = range(self.columnCount()) if cols is None else cols
+        text = None
+        for col in cols:
+            values = self.columns[col][rows]
+            cells = np.where(np.isnan(values), "", np.char.mod(self.fmt, values))
+            text = cells if text is None else np.char.add(np.char.add(text, "\t"), cells)
+        if text is None:
+            return ""
+        return "\n".join(text.tolist())
+
+
+class TableView(QTableView):
+    '''Table view with copy/paste/delete actions over an ArrayTableModel.'''
+
+    def __init__(self, model, *args):
+        super().__init__(*args)
+        self.setModel(model)
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+        # Fixed row heights let Qt skip measuring every row of a large table
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+        # Copy action
+        copy_action = QAction("Copy", self)
+        copy_action.triggered.connect(self.copy)
+        self.addAction(copy_action)
+
+        # Paste action
+        paste_action = QAction("Paste", self)
+        paste_action.triggered.connect(self.paste)
+        self.addAction(paste_action)
+
+        # Delete action
+        delete_action = QAction("Delete", self)
+        delete_action.triggered.connect(self.delete_selected)
+        self.addAction(delete_action)
+
+    def selected_rows(self):
+        '''Sorted array of selected row numbers, built from the selection ranges.'''
+        ranges = self.selectionModel().selection()
+        if ranges.isEmpty():
+            return np.array([], dtype=int)
+        return np.unique(np.concatenate([np.arange(r.top(), r.bottom() + 1) for r in ranges]))
+
+    def copy(self):
+        selected_ranges = self.selectionModel().selection()
+        if selected_ranges.isEmpty():
+            return
+
+        copied_data = []
+        for selection in selected_ranges:
+            rows = slice(selection.top(), selection.bottom() + 1)
+            cols = range(selection.left(), selection.right() + 1)
+            copied_data.append(self.model().to_text(rows, cols))
+
+        QApplication.clipboard().setText("\n".join(copied_data).strip())
+
+    def paste(self):
+        clipboard = QApplication.clipboard()
+        data = clipboard.text()
+        if data:
+            current_row = max(self.currentIndex().row(), 0)
+            current_col = max(self.currentIndex().column(), 0)
+
+            # Expandable tables take every pasted column, others stop at their width
+            max_cols = None if self.model().expandable else self.model().columnCount() - current_col
+            with profiling.stage('paste', chars=len(data)):
+                block = engine.parse_delimited(data, max_cols=max_cols)
+                self.model().set_block(current_row, current_col, block)
+
+    def delete_selected(self):
+        model = self.model()
+        for selection in self.selectionModel().selection():
+            rows = slice(selection.top(), selection.bottom() + 1)
+            for col in range(selection.left(), selection.right() + 1):
+                model.column(col)[rows] = np.nan
+            model.dataChanged.emit(selection.topLeft(), selection.bottomRight())
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy()
+        elif event.matches(QKeySequence.Paste):
+            self.paste()
+        elif event.key() in [Qt.Key_Backspace, Qt.Key_Delete]:
+            self.delete_selected()
+        else:
+            super().keyPressEvent(event)
+
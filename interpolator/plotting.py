@@ -0,0 +1,167 @@
+'''
+Level-of-detail rendering for the DataFit & Interpolation Tool plot.
+
+Each series is summarised once into a min/max pyramid. When drawing, only
+about two points per horizontal pixel of the visible x-range are handed to
+matplotlib, and the series is re-decimated whenever the view is zoomed or
+panned. Because every bucket keeps its extreme points, the decimated line
+covers the same pixels as the full one.
+
+'''
+
+import numpy as np
+
+
+class MinMaxPyramid:
+    '''
+    Multi-resolution min/max summary of a series. Level k groups the x-sorted
+    points into buckets of FACTOR**(k + 1) and stores, per bucket, the index
+    of its smallest and largest y value.
+    '''
+    FACTOR = 4
+
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(x) > 1 and not (x[1:] >= x[:-1]).all():
+            order = np.argsort(x, kind='stable')
+            x, y = x[order], y[order]
+        self.x = x
+        self.y = y
+
+        # Each level is built from the one below it, so the whole pyramid is O(n)
+        self.levels = []
+        imin = imax = np.arange(len(y))
+        bucket = 1
+        while len(imin) > self.FACTOR:
+            imin, imax = self._reduce(imin, imax)
+            bucket *= self.FACTOR
+            self.levels.append((bucket, imin, imax))
+
+    def _reduce(self, imin, imax):
+        n = len(imin)
+        groups = -(-n // self.FACTOR)
+        pad = groups * self.FACTOR - n
+        # Pad by repeating the last entry so every group is full
+        imin = np.concatenate([imin, np.repeat(imin[-1:], pad)]).reshape(groups, self.FACTOR)
+        imax = np.concatenate([imax, np.repeat(imax[-1:], pad)]).reshape(groups, self.FACTOR)
+        if n == len(self.y):
+            # First level: min and max candidates are the raw points themselves
+            ymin = ymax = np.concatenate([self.y, np.repeat(self.y[-1:], pad)]).reshape(groups, self.FACTOR)
+        else:
+            ymin, ymax = self.y[imin], self.y[imax]
+        rows = np.arange(groups)
+        return imin[rows, np.argmin(ymin, axis=1)], imax[rows, np.argmax(ymax, axis=1)]
+
+    def query(self, xmin=None, xmax=None, pixels=1000):
+        '''Decimated (x, y) covering [xmin, xmax] with about 2 points per pixel.'''
+        n = len(self.x)
+        i0 = 0 if xmin is None else max(np.searchsorted(self.x, xmin, side='left') - 1, 0)
+        i1 = n if xmax is None else min(np.searchsorted(self.x, xmax, side='right') + 1, n)
+        count = i1 - i0
+        if count <= 2 * pixels or not self.levels:
+            return self.x[i0:i1], self.y[i0:i1]
+
+        # Coarsest level that still has at least one bucket per pixel
+        bucket, imin, imax = self.levels[0]
+        for level in self.levels:
+            if count // level[0] < pixels:
+                break
+            bucket, imin, imax = level
+
+        b0, b1 = i0 // bucket, -(-i1 // bucket)
+        idx = np.sort(np.column_stack([imin[b0:b1], imax[b0:b1]]), axis=1).ravel()
+        # Keep the exact end points of the visible range
+        idx = np.concatenate([[i0], idx[(idx > i0) & (idx < i1 - 1)], [i1 - 1]])
+        return self.x[idx], self.y[idx]
+
+
+class DecimatedLine:
+    '''
+    A persistent matplotlib Line2D that only ever holds the decimated view of
+    its series. set_series() swaps the data in place instead of replotting.
+    '''
+
+    def __init__(self, ax, *args, **kwargs):
+        self.ax = ax
+        self.pyramid = MinMaxPyramid([], [])
+        self.line, = ax.plot([], [], *args, **kwargs)
+
+    def set_series(self, x, y):
+        self.pyramid = MinMaxPyramid(x, y)
+        self.line.set_data(*self.pyramid.query(pixels=pixel_width(self.ax)))
+
+    def refresh(self, xlim, pixels):
+        self.line.set_data(*self.pyramid.query(xlim[0], xlim[1], pixels))
+
+
+class LODPlot:
+    '''
+    Manages the decimated lines on one Axes and re-decimates them for the
+    visible x-range whenever the limits change (zoom, pan, home).
+    '''
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.lines = []
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+
+    def add(self, *args, **kwargs):
+        '''Create an empty persistent line; fill it later with set_series().'''
+        line = DecimatedLine(self.ax, *args, **kwargs)
+        self.lines.append(line)
+        return line
+
+    def autoscale(self):
+        '''Fit the view to the visible lines, as a fresh plot would.'''
+        self.ax.set_autoscale_on(True)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+
+    def on_xlim_changed(self, ax):
+        xlim = ax.get_xlim()
+        pixels = pixel_width(ax)
+        for line in self.lines:
+            line.refresh(xlim, pixels)
+
+
+class BlitManager:
+    '''
+    Draws animated artists over a cached background. A full canvas draw
+    refreshes the background; update() then only restores it and redraws the
+    animated artists, which is far cheaper than canvas.draw().
+    '''
+
+    def __init__(self, canvas, artists=()):
+        self.canvas = canvas
+        self.background = None
+        self.artists = []
+        for artist in artists:
+            self.add(artist)
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add(self, artist):
+        artist.set_animated(True)
+        self.artists.append(artist)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        figure = self.canvas.figure
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def update(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+        self.canvas.flush_events()
+
+
+def pixel_width(ax):
+    return max(int(ax.get_window_extent().width), 100)
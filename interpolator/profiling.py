@@ -0,0 +1,153 @@
+'''
+Timing instrumentation for the DataFit & Interpolation Tool.
+
+Code marks its stages with
+
+    with profiling.stage('fit', method=method):
+        ...
+
+and the module-level tracer records one timed event per stage, from any
+thread. The GUI shows the latest duration of each stage in the status bar,
+and a session can be saved in Chrome trace format (load it in
+chrome://tracing or https://ui.perfetto.dev). A cProfile capture can be
+switched on alongside, covering the UI thread and every worker job.
+
+'''
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# Oldest events are dropped past this, so a long session cannot grow without bound
+MAX_EVENTS = 100_000
+
+
+class Tracer:
+    '''Thread-safe recorder of timed stages.'''
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.last = {}  # stage name -> latest duration in seconds
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), args)
+
+    def record(self, name, start, end, args=None):
+        event = (name, start, end - start, threading.get_ident(), args or {})
+        with self.lock:
+            self.events.append(event)
+            self.last[name] = end - start
+
+    def latest(self, names=None):
+        '''{stage: seconds} of the latest run of each stage (or just of names).'''
+        with self.lock:
+            if names is None:
+                return dict(self.last)
+            return {name: self.last[name] for name in names if name in self.last}
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.last.clear()
+
+    def chrome_trace(self):
+        '''The recorded events as a Chrome trace ("X" complete events, times in us).'''
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        threads = {tid: i for i, tid in enumerate(sorted({e[3] for e in events}))}
+        trace = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': threads[tid],
+                  'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6, 'args': args}
+                 for name, start, duration, tid, args in events]
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+class ProfileCapture:
+    '''
+    Optional cProfile capture. cProfile only sees the thread it is enabled
+    in, so the UI thread gets one profiler while capturing and each worker job
+    is run under its own; all of them are merged into one pstats.Stats.
+    '''
+
+    def __init__(self):
+        self.active = False
+        self.stats = None
+        self.profiler = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.active:
+            return
+        self.stats = None
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        self.active = True
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        self.profiler.disable()
+        self._add(self.profiler)
+        self.profiler = None
+
+    def run(self, fn, *args):
+        '''fn(*args), profiled if a capture is running.'''
+        if not self.active:
+            return fn(*args)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args)
+        finally:
+            self._add(profiler)
+
+    def _add(self, profiler):
+        with self.lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def dump(self, path):
+        '''Write the merged stats: binary pstats for .prof, else a text report.'''
+        with self.lock:
+            if self.stats is None:
+                raise ValueError("No profile has been captured.")
+            if path.endswith('.prof'):
+                self.stats.dump_stats(path)
+            else:
+                with open(path, 'w') as f:
+                    report = pstats.Stats(stream=f)
+                    report.add(self.stats)
+                    report.sort_stats('cumulative').print_stats(50)
+
+
+tracer = Tracer()
+profile = ProfileCapture()
+
+
+def stage(name, **args):
+    '''Time a block as the named stage on the session tracer.'''
+    return tracer.stage(name, **args)
+
+
+def format_stages(timings):
+    '''"fit 12.3 ms | draw 40.1 ms" for the status bar.'''
+    return " | ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items())
@@ -0,0 +1,271 @@
+'''
+Cubic smoothing spline for the DataFit & Interpolation Tool.
+
+Minimises  sum w_i (y_i - g(x_i))^2 + lam * integral g''(x)^2 dx  over cubic
+splines g written in a B-spline basis. Small data sets use every distinct x
+as a knot, which gives the exact smoothing spline. Large ones use knots at
+MAX_KNOTS quantiles of x, as R's smooth.spline does. Each data point touches
+only four basis functions, so the normal equations are built in one O(n)
+pass and are banded (seven diagonals). They are solved with LAPACK's banded
+Cholesky.
+
+When lam is not given it is picked by generalized cross-validation (GCV).
+The trace of the hat matrix comes from the central band of the inverse of
+the normal matrix (Hutchinson & de Hoog, 1985), so each GCV evaluation is
+O(n) for the residuals plus O(knots) for the solve.
+
+'''
+
+import numpy as np
+from scipy.interpolate import BSpline
+from scipy.linalg import cho_solve_banded, cholesky_banded
+from scipy.optimize import minimize_scalar
+
+
+DEGREE = 3
+BAND = DEGREE  # B^T W B and the penalty have DEGREE diagonals either side
+
+# Interior knots are capped here; the solve and GCV then cost O(MAX_KNOTS)
+MAX_KNOTS = 400
+
+# GCV search range for log10(lam / scale), where scale balances the two terms.
+# Below about 1e-4 every fit is already interpolating the data.
+GCV_BOUNDS = (-6.0, 9.0)
+
+# The O(knots) residual sum of squares is only trusted above this fraction of
+# y'Wy; below it, rounding in the difference of large terms can dominate
+RSS_RTOL = 1e-8
+
+# Tolerance of the GCV search, in log10(lam)
+GCV_XATOL = 0.02
+
+# GCV never picks a fit with fewer residual degrees of freedom (n - df) than
+# this fraction of n. Near interpolation its score is rounding noise over
+# rounding noise, and on some small samples even the exact score keeps
+# falling all the way to the interpolant.
+GCV_MIN_RESIDUAL_DF = 0.05
+
+
+class SmoothingSpline:
+    '''
+    Fit a smoothing spline to (x, y) with optional positive weights w. x need
+    not be sorted and may repeat. y may be 2-D (points, series): the basis,
+    normal matrix and penalty are then shared by every series. lam=None
+    selects the smoothing parameter of each series by GCV. Call the object to
+    evaluate the fitted spline(s).
+    '''
+
+    def __init__(self, x, y, w=None, lam=None, max_knots=MAX_KNOTS):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        w = np.ones(len(x)) if w is None else np.asarray(w, dtype=float)
+        if len(w) != len(x):
+            raise ValueError("Need one weight per data point.")
+        if not (w > 0).all():
+            raise ValueError("Weights must be positive.")
+
+        if (x[1:] >= x[:-1]).all():
+            # Sorted already (the engine passes sorted x): distinct values in one pass
+            knots = x[np.concatenate([[True], x[1:] != x[:-1]])]
+        else:
+            knots = np.unique(x)
+        if len(knots) < 3:
+            raise ValueError("Smoothing spline needs at least three distinct x values.")
+        if len(knots) > max_knots:
+            knots = knots[np.linspace(0, len(knots) - 1, max_knots).round().astype(int)]
+        self.t = np.concatenate([[knots[0]] * DEGREE, knots, [knots[-1]] * DEGREE])
+
+        self.x, self.y, self.w = x, y, w
+        Y = y.reshape(len(x), -1)
+        self._setup(Y)
+        self.gcv_bounds = None  # GCV search range, found on first use
+        if lam is None:
+            lams = np.array([self._gcv_lam(j) for j in range(Y.shape[1])])
+        elif not lam > 0:
+            raise ValueError("Smoothing factor must be positive.")
+        else:
+            lams = np.full(Y.shape[1], float(lam))
+
+        # One factorisation per distinct lam, shared by every series that uses it
+        coefs = np.empty((len(self.rhs), Y.shape[1]))
+        df = np.empty(Y.shape[1])
+        for value in np.unique(lams):
+            cols = lams == value
+            factor = self._factor(value)
+            coefs[:, cols] = self._solve(factor, cols)
+            df[cols] = self._trace(factor)
+        coefs += self.mean  # the spline reproduces constants exactly
+
+        shape = y.shape[1:]
+        self.spline = BSpline(self.t, coefs.reshape((-1,) + shape), DEGREE)
+        self.lam = lams.reshape(shape) if shape else lams[0]
+        self.df = df.reshape(shape) if shape else df[0]  # effective degrees of freedom, 2 (line) .. knots
+
+    def __call__(self, x):
+        return self.spline(x)
+
+    def _setup(self, Y):
+        '''Banded normal matrix B^T W B, penalty Omega and B^T W y; none depend on lam.'''
+        basis = BSpline.design_matrix(self.x, self.t, DEGREE)
+        self.basis = basis  # Sparse, four entries per row
+        values = basis.data.reshape(-1, DEGREE + 1)
+        first = basis.indices[::DEGREE + 1]
+        size = len(self.t) - DEGREE - 1
+
+        # Upper banded form as used by cholesky_banded: row BAND is the diagonal
+        self.gram = np.zeros((BAND + 1, size))
+        for a in range(DEGREE + 1):
+            for b in range(a, DEGREE + 1):
+                col = first + b
+                self.gram[BAND - (b - a)] += np.bincount(col, self.w * values[:, a] * values[:, b],
+                                                         minlength=size)
+
+        # Centred series keep the algebraic residual sum below well conditioned
+        self.mean = (self.w @ Y) / self.w.sum()
+        Wy = self.w[:, None] * (Y - self.mean)
+        self.rhs = basis.T @ Wy
+        self.yWy = np.einsum('ij,ij->j', Y - self.mean, Wy)
+
+        self.penalty = penalty_band(self.t)
+        # Balances the two terms, so the GCV bounds work for any x units
+        self.scale = self.gram[BAND].sum() / self.penalty[BAND].sum()
+
+    def _factor(self, lam):
+        return cholesky_banded(self.gram + lam * self.penalty)
+
+    def _solve(self, factor, cols=slice(None)):
+        return cho_solve_banded((factor, False), self.rhs[:, cols])
+
+    def _trace(self, factor):
+        '''tr(A) of the hat matrix = tr(H^-1 B^T W B), with H = B^T W B + lam Omega.'''
+        inverse = band_inverse(factor)
+        trace = inverse[BAND] @ self.gram[BAND]
+        for k in range(1, BAND + 1):
+            trace += 2 * inverse[BAND - k, k:] @ self.gram[BAND - k, k:]
+        return trace
+
+    def _rss(self, c, col):
+        '''
+        Weighted residual sum of squares of series col for coefficients c,
+        as y'Wy - 2 c'B'Wy + c'B'WBc: O(knots) rather than O(n). Close to
+        interpolation that difference cancels down to rounding error, so
+        there the residuals themselves are summed, in O(n).
+        '''
+        g = self.gram
+        Gc = g[BAND] * c
+        for k in range(1, BAND + 1):
+            Gc[:-k] += g[BAND - k, k:] * c[k:]
+            Gc[k:] += g[BAND - k, k:] * c[:-k]
+        rss = self.yWy[col] - 2 * c @ self.rhs[:, col] + c @ Gc
+        if rss > RSS_RTOL * self.yWy[col]:
+            return rss
+        residuals = self.y.reshape(len(self.x), -1)[:, col] - self.mean[col] - self.basis @ c
+        return self.w @ residuals**2
+
+    def gcv(self, lam, col=0):
+        '''GCV score of lam; inf for a fit that interpolates, so GCV never picks one.'''
+        factor = self._factor(lam)
+        n = len(self.x)
+        residual_df = n - self._trace(factor)
+        if residual_df < GCV_MIN_RESIDUAL_DF * n:
+            return np.inf
+        c = self._solve(factor, col)
+        return n * self._rss(c, col) / residual_df**2
+
+    def _gcv_lam(self, col):
+        def score(p):
+            try:
+                return self.gcv(self.scale * 10**p, col)
+            except np.linalg.LinAlgError:
+                return np.inf
+        if self.gcv_bounds is None:
+            self.gcv_bounds = (self._min_log_lam(), GCV_BOUNDS[1])
+        best = minimize_scalar(score, bounds=self.gcv_bounds, method='bounded', options={'xatol': GCV_XATOL})
+        return self.scale * 10**best.x
+
+    def _min_log_lam(self):
+        '''
+        Smallest log10(lam / scale) in GCV_BOUNDS whose fit keeps enough
+        residual degrees of freedom for GCV. df falls as lam grows, so bisect.
+        '''
+        n = len(self.x)
+
+        def smooths(p):
+            try:
+                return n - self._trace(self._factor(self.scale * 10**p)) >= GCV_MIN_RESIDUAL_DF * n
+            except np.linalg.LinAlgError:
+                return False
+        lo, hi = GCV_BOUNDS
+        if smooths(lo):
+            return lo
+        while hi - lo > GCV_XATOL:
+            mid = (lo + hi) / 2
+            if smooths(mid):
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+
+def penalty_band(t):
+    '''
+    Omega[i, j] = integral B_i''(x) B_j''(x) dx in upper banded form. The
+    second derivatives are linear on each knot interval, so two-point
+    Gauss-Legendre quadrature per interval is exact.
+    '''
+    size = len(t) - DEGREE - 1
+    edges = np.unique(t)
+    mid = (edges[1:] + edges[:-1]) / 2
+    half = (edges[1:] - edges[:-1]) / 2
+    offset = half / np.sqrt(3)
+    points = np.concatenate([mid - offset, mid + offset])
+    weights = np.concatenate([half, half])
+
+    # Second derivative of every basis function at every quadrature point
+    d2 = BSpline(t, np.eye(size), DEGREE).derivative(2)(points)
+    omega = (d2 * weights[:, None]).T @ d2
+
+    band = np.zeros((BAND + 1, size))
+    for k in range(BAND + 1):
+        band[BAND - k, k:] = np.diagonal(omega, k)
+    return band
+
+
+def band_inverse(factor):
+    '''
+    Central band of H^-1 in the same upper banded form, given the banded
+    Cholesky factor U of H (H = U^T U), for the seven-diagonal H of a cubic
+    basis. Only the band is ever formed, using the Hutchinson & de Hoog
+    recurrence: from U S = U^-T,
+        S[i, j] = (delta_ij / u_ii - sum_k u[i, i+k] S[i+k, j]) / u_ii
+    walking i from the last row up, so the cost is O(size).
+    '''
+    size = factor.shape[1]
+    d = factor[3].tolist()
+    # Row i of U off the diagonal, padded with zeros past the end
+    u1 = factor[2, 1:].tolist() + [0.0]
+    u2 = factor[1, 2:].tolist() + [0.0] * 2
+    u3 = factor[0, 3:].tolist() + [0.0] * 3
+
+    diag = [0.0] * size
+    off1 = [0.0] * size
+    off2 = [0.0] * size
+    off3 = [0.0] * size
+    # Window of S over rows/columns i+1..i+3
+    s11 = s12 = s13 = s22 = s23 = s33 = 0.0
+    for i in range(size - 1, -1, -1):
+        a, b, c = u1[i] / d[i], u2[i] / d[i], u3[i] / d[i]
+        s01 = -(a * s11 + b * s12 + c * s13)
+        s02 = -(a * s12 + b * s22 + c * s23)
+        s03 = -(a * s13 + b * s23 + c * s33)
+        s00 = 1 / d[i]**2 - (a * s01 + b * s02 + c * s03)
+        diag[i], off1[i], off2[i], off3[i] = s00, s01, s02, s03
+        s11, s12, s13, s22, s23, s33 = s00, s01, s02, s11, s12, s22
+
+    # S[i, i + k] goes to row BAND - k, column i + k
+    S = np.zeros((BAND + 1, size))
+    S[3] = diag
+    S[2, 1:] = off1[:-1]
+    S[1, 2:] = off2[:-2]
+    S[0, 3:] = off3[:-3]
+    return S
@@ -0,0 +1,26 @@
+'''
+Tests for batch fitting and resampling.
+
+Run from this directory with: python -m pytest
+
+'''
+
+import numpy as np
+
+import batch
+import engine
+
+
+def test_default_dx_fine_spacing():
+    assert engine.default_dx(np.linspace(0, 1, 1000)) == 0.001
+    assert engine.default_dx(np.linspace(0, 23, 10)) == 2.3
+
+
+def test_process_file_fine_spacing(tmp_path):
+    x = np.linspace(0, 1, 1000)
+    path = tmp_path / 'fine.csv'
+    np.savetxt(path, np.column_stack([x, 2 * x]), delimiter=',', header='x,y', comments='')
+    out_path, rows = batch.process_file(str(path), 'Linear Interpolation', None, str(tmp_path))
+    assert rows == engine.grid_size(0.0, 1.0, 0.001)
+    sampled = np.loadtxt(out_path, delimiter=',', skiprows=1)
+    assert np.allclose(sampled[:, 1], 2 * sampled[:, 0])
@@ -0,0 +1,19 @@
+'''
+Tests for the fit methods.
+
+Run from this directory with: python -m pytest
+
+'''
+
+import numpy as np
+import pytest
+
+import engine
+
+
+def test_cubic_spline_needs_four_points():
+    for n in (2, 3):
+        with pytest.raises(ValueError, match="at least four distinct X values"):
+            engine.CubicSplineFit(np.arange(n, dtype=float), np.arange(n, dtype=float))
+    spline = engine.CubicSplineFit(np.arange(4.0), np.arange(4.0) ** 2)
+    assert np.allclose(spline.evaluate([1.5]), 2.25)
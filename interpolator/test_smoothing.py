@@ -0,0 +1,48 @@
+'''
+Tests for the smoothing spline's automatic (GCV) choice of lambda.
+
+Run from this directory with: python -m pytest
+
+'''
+
+import warnings
+
+import numpy as np
+from scipy.interpolate import BSpline
+
+import smoothing
+
+
+def noisy_sine(n, seed, noise=0.1):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 2 * np.pi, n)
+    return x, np.sin(x) + noise * rng.standard_normal(n)
+
+
+def test_gcv_smooths_noisy_data():
+    for n in (20, 50):
+        dfs = []
+        for seed in range(10):
+            x, y = noisy_sine(n, seed)
+            dfs.append(smoothing.SmoothingSpline(x, y).df)
+        # Never an interpolant, and a real smoothing fit on typical samples
+        assert max(dfs) <= (1 - smoothing.GCV_MIN_RESIDUAL_DF) * n + 1e-6
+        assert np.median(dfs) < n / 2
+
+
+def test_gcv_three_points_without_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        spline = smoothing.SmoothingSpline([0.0, 1.0, 2.0], [0.0, 1.0, 0.0])
+    assert 2 <= spline.df < 3
+
+
+def test_rss_near_interpolation_matches_residuals():
+    x, y = noisy_sine(20, 0, noise=0.01)
+    spline = smoothing.SmoothingSpline(x, y, lam=1.0)
+    for p in (-10, -8, -6, -2, 0, 2):
+        c = spline._solve(spline._factor(spline.scale * 10.0**p), 0)
+        residuals = y - BSpline(spline.t, c + spline.mean[0], smoothing.DEGREE)(x)
+        rss = spline._rss(c, 0)
+        assert rss > 0
+        assert np.isclose(rss, residuals @ residuals, rtol=1e-3)
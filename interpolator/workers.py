@@ -0,0 +1,195 @@
+'''
+Background jobs for the DataFit & Interpolation Tool.
+
+Fitting and resampling run on a QThreadPool so the window stays responsive.
+Results come back to the UI thread through Qt signals. Each kind of job has
+at most one live instance: submitting a new one cancels the stale one and
+drops whatever it would have returned.
+
+'''
+
+from itertools import count
+
+import numpy as np
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+import bootstrap
+import engine
+import exporters
+import loaders
+import profiling
+
+
+class Cancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    progress = Signal(str, int, int)     # kind, job id, percent
+    finished = Signal(str, int, object)  # kind, job id, result
+    failed = Signal(str, int, str)       # kind, job id, error message
+
+
+class Job(QRunnable):
+    '''
+    Runs fn(job, *args) on a worker thread. fn calls job.report(done, total)
+    to publish progress; report() raises Cancelled once the job is cancelled.
+    '''
+
+    def __init__(self, kind, job_id, fn, *args):
+        super().__init__()
+        self.kind = kind
+        self.job_id = job_id
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+        self.percent = -1
+        self.signals = JobSignals()
+
+    def run(self):
+        try:
+            # Profiled along with the UI thread while a cProfile capture is running
+            result = profiling.profile.run(self.fn, self, *self.args)
+        except Cancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.kind, self.job_id, str(e))
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(self.kind, self.job_id, result)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def report(self, done, total):
+        self.check()
+        percent = int(100 * done / total) if total else 100
+        if percent != self.percent:
+            self.percent = percent
+            self.signals.progress.emit(self.kind, self.job_id, percent)
+
+
+class JobRunner(QObject):
+    '''
+    Submits jobs to the global thread pool, keyed by kind (e.g. 'fit',
+    'resample'). A newer job of the same kind supersedes the older one.
+    '''
+    started = Signal(str)
+    progress = Signal(str, int)
+    finished = Signal(str, object)
+    failed = Signal(str, str)
+    idle = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.jobs = {}
+        self.ids = count()
+
+    def submit(self, kind, fn, *args):
+        self.cancel(kind)
+        job = Job(kind, next(self.ids), fn, *args)
+        job.signals.progress.connect(self._on_progress)
+        job.signals.finished.connect(self._on_finished)
+        job.signals.failed.connect(self._on_failed)
+        self.jobs[kind] = job
+        self.pool.start(job)
+        self.started.emit(kind)
+        return job
+
+    def cancel(self, kind=None):
+        '''Cancel the job of the given kind, or every running job.'''
+        kinds = list(self.jobs) if kind is None else [kind]
+        for k in kinds:
+            job = self.jobs.pop(k, None)
+            if job is not None:
+                job.cancel()
+        if kind is None or not self.jobs:
+            self.idle.emit()
+
+    def is_busy(self):
+        return bool(self.jobs)
+
+    def _is_current(self, kind, job_id):
+        job = self.jobs.get(kind)
+        return job is not None and job.job_id == job_id
+
+    def _on_progress(self, kind, job_id, percent):
+        if self._is_current(kind, job_id):
+            self.progress.emit(kind, percent)
+
+    def _on_finished(self, kind, job_id, result):
+        if self._is_current(kind, job_id):
+            del self.jobs[kind]
+            self.finished.emit(kind, result)
+            if not self.jobs:
+                self.idle.emit()
+
+    def _on_failed(self, kind, job_id, message):
+        if self._is_current(kind, job_id):
+            del self.jobs[kind]
+            self.failed.emit(kind, message)
+            if not self.jobs:
+                self.idle.emit()
+
+
+def fit_job(job, cache, x, y, method, params):
+    return cache.fit(x, y, method, **params)
+
+
+def resample_job(job, cache, x, y, method, params, dx):
+    model = cache.fit(x, y, method, **params)
+    job.check()
+    sampled_x = engine.sample_grid(model.x, dx)
+    with profiling.stage('resample', points=len(sampled_x)):
+        sampled_y = model.evaluate_chunked(sampled_x, progress=job.report)
+    return model, sampled_x, sampled_y
+
+
+def grid_resample_job(job, cache, x, y, method, params, grid, grid_file=None):
+    '''Resample onto a target grid, or onto one read from grid_file = (path, column).'''
+    if grid_file is not None:
+        with profiling.stage('import', path=grid_file[0]):
+            grid = engine.target_grid(loaders.load_grid(*grid_file))
+    model = cache.fit(x, y, method, **params)
+    job.check()
+    with profiling.stage('resample', points=len(grid)):
+        sampled_y = model.evaluate_chunked(grid, progress=job.report)
+    return model, grid, sampled_y
+
+
+def stream_resample_job(job, cache, x, y, method, params, dx, path, columns, precision):
+    '''Resample chunk by chunk straight to a file, keeping only a preview in memory.'''
+    model = cache.fit(x, y, method, **params)
+    job.check()
+    total = engine.grid_size(np.min(model.x), np.max(model.x), dx)
+    preview = engine.Preview(total)
+    with profiling.stage('resample', points=total, path=path), \
+            exporters.open_writer(path, columns, total, precision) as writer:
+        engine.stream_resample(model, dx, [writer, preview], progress=job.report)
+    return model, preview, path, total
+
+
+def band_job(job, x, y, method, params, grid, replicates, level):
+    with profiling.stage('bootstrap', method=method, points=len(x), replicates=replicates):
+        return bootstrap.band(x, y, method, grid, replicates, level, progress=job.report, **params)
+
+
+def export_job(job, path, arrays, columns, precision):
+    with profiling.stage('export', rows=len(arrays[0]), path=path):
+        exporters.export_arrays(path, arrays, columns, precision, progress=job.report)
+    return path
+
+
+def import_job(job, path, options):
+    '''Load the X column and every selected Y column in one pass.'''
+    options = dict(options)
+    cols = [options.pop('x_col', None)] + list(options.pop('y_cols', None) or [None])
+    with profiling.stage('import', path=path):
+        x, *ys = loaders.load_columns(path, cols, progress=job.report, **options)
+    return path, x, ys